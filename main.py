@@ -14,17 +14,28 @@ import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Set, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import hashlib
 import struct
+import time
+import io
+import gzip
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 # Agregar src al path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.utils.file_utils import get_video_files, extract_subtitle, SUBTITLE_EXTENSIONS
+from src.utils.file_utils import get_video_files, extract_subtitle, write_chunks, SUBTITLE_EXTENSIONS
 from src.utils.parser import parse_video_filename, build_search_query
+from src.utils.jsonio import json_loads, json_dumps
+from src.utils.pools import PoolQueue
 from src.config import OPENSUBTITLES_API_KEY, API_URL
 
 # Intentar importar tkinterdnd2 para drag & drop
@@ -34,65 +45,160 @@ try:
 except ImportError:
     DND_AVAILABLE = False
 
-# Intentar importar Subliminal para fallback
+# Subliminal (fallback) se importa bajo demanda: arrastra babelfish, guessit,
+# stevedore, etc. y retrasaría el arranque de la ventana
+scan_video = None
+ProviderPool = None
+BabelLanguage = None
+
+
+@lru_cache(maxsize=None)
+def subliminal_available() -> bool:
+    """Importa Subliminal la primera vez que se necesita e indica si está disponible."""
+    global scan_video, ProviderPool, BabelLanguage
+    try:
+        from subliminal import scan_video
+        from subliminal.core import ProviderPool
+        from babelfish import Language as BabelLanguage
+        return True
+    except ImportError:
+        return False
+
+# Intentar importar NumPy para acelerar el hash de OpenSubtitles
 try:
-    from subliminal import scan_video, download_best_subtitles, save_subtitles
-    from subliminal.core import ProviderPool
-    from babelfish import Language as BabelLanguage
-    SUBLIMINAL_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except ImportError:
-    SUBLIMINAL_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+# Sufijos de idioma aceptados en el nombre del subtítulo (video.es.srt)
+SUBTITLE_LANG_SUFFIXES = ('.es', '.en', '.spa', '.eng')
+
+# Firmas para detectar el formato del contenido descargado
+ZIP_MAGIC = b'PK\x03\x04'
+GZIP_MAGIC = b'\x1f\x8b'
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# Separa la lista de rutas de un drop de TkDnD: {ruta con espacios} o ruta
+_DND_SPLIT = re.compile(r'\{([^}]*)\}|(\S+)')
+
+# Máximo de hilos para hashes y búsquedas en lote
+MAX_WORKERS = 8
+
+# Tamaño de cada bloque (inicio y final del archivo) usado por el hash
+HASH_BLOCK_SIZE = 65536
+
+# Intervalo (ms) con que se publican en la UI los mensajes de estado
+STATUS_FLUSH_MS = 100
+
+
+def _sum_uint64(buffer: bytes) -> int:
+    """Suma los enteros de 64 bits (little-endian) contenidos en un buffer."""
+    if NUMPY_AVAILABLE:
+        # uint64 hace wrap-around módulo 2^64, igual que el algoritmo original
+        return int(np.frombuffer(buffer, dtype='<u8').sum(dtype=np.uint64))
+    
+    # Sin NumPy: un único unpack de todo el bloque y sum() en C
+    return sum(struct.unpack('<%dQ' % (len(buffer) // 8), buffer))
+
+
+def _read_block(f, offset: int) -> bytes:
+    """Lee un bloque del hash en una sola llamada al sistema."""
+    if hasattr(os, 'pread'):
+        # pread no mueve el cursor ni pasa por el buffer de Python
+        return os.pread(f.fileno(), HASH_BLOCK_SIZE, offset)
+    
+    # Windows no tiene pread
+    f.seek(offset, 0)
+    return f.read(HASH_BLOCK_SIZE)
 
 
 def get_file_hash(filepath: str) -> Optional[str]:
     """Calcula el hash OpenSubtitles de un archivo de video."""
     try:
-        longlongformat = '<q'
-        bytesize = struct.calcsize(longlongformat)
+        # Descartar archivos pequeños sin llegar a abrirlos
+        filesize = os.path.getsize(filepath)
+        if filesize < HASH_BLOCK_SIZE * 2:
+            return None
         
-        with open(filepath, "rb") as f:
-            filesize = os.path.getsize(filepath)
-            hash_val = filesize
-            
-            if filesize < 65536 * 2:
-                return None
-            
-            for _ in range(65536 // bytesize):
-                buffer = f.read(bytesize)
-                (l_value,) = struct.unpack(longlongformat, buffer)
-                hash_val += l_value
-                hash_val = hash_val & 0xFFFFFFFFFFFFFFFF
-            
-            f.seek(max(0, filesize - 65536), 0)
-            for _ in range(65536 // bytesize):
-                buffer = f.read(bytesize)
-                (l_value,) = struct.unpack(longlongformat, buffer)
-                hash_val += l_value
-                hash_val = hash_val & 0xFFFFFFFFFFFFFFFF
+        with open(filepath, "rb", buffering=0) as f:
+            head = _read_block(f, 0)
+            tail = _read_block(f, max(0, filesize - HASH_BLOCK_SIZE))
         
+        hash_val = (filesize + _sum_uint64(head) + _sum_uint64(tail)) & 0xFFFFFFFFFFFFFFFF
         return "%016x" % hash_val
     except:
         return None
 
 
+def _folder_key(path) -> str:
+    """Clave de carpeta igual para "C:/x", "C:\\x" o "C:/x/" (caché de listados)."""
+    return os.path.normcase(str(Path(path)))
+
+
 class OpenSubtitlesAPI:
     """Cliente para la API de OpenSubtitles."""
     
+    # Peticiones simultáneas permitidas y peticiones por segundo (límite de la API)
+    MAX_CONCURRENT_REQUESTS = 5
+    MAX_REQUESTS_PER_SECOND = 5
+    
+    # Caché de búsquedas: entradas máximas y vigencia en segundos
+    SEARCH_CACHE_SIZE = 512
+    SEARCH_CACHE_TTL = 600
+    
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = API_URL
-    
-    def _headers(self) -> dict:
-        return {
+        
+        # Sesión compartida: reutiliza conexiones TCP/TLS entre llamadas
+        self.session = requests.Session()
+        # Headers fijos instalados una sola vez en la sesión
+        self.session.headers.update({
             'Api-Key': self.api_key,
             'Content-Type': 'application/json',
             'User-Agent': 'SubtitleDownloaderApp v1.0',
-        }
+        })
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+        
+        # Limita las peticiones en vuelo cuando se llama desde varios hilos
+        self._throttle = threading.BoundedSemaphore(self.MAX_CONCURRENT_REQUESTS)
+        # El semáforo no limita la tasa: además se espacian los envíos para no
+        # superar MAX_REQUESTS_PER_SECOND (y evitar respuestas 429)
+        self._next_request_at = 0.0
+        self._rate_lock = threading.Lock()
+        
+        # Parámetros de búsqueda -> (momento, resultados)
+        self._search_cache: "OrderedDict[tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _wait_rate_limit(self):
+        """Espera el turno del próximo envío (como mucho MAX_REQUESTS_PER_SECOND)."""
+        interval = 1.0 / self.MAX_REQUESTS_PER_SECOND
+        with self._rate_lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_request_at)
+            self._next_request_at = send_at + interval
+        if send_at > now:
+            time.sleep(send_at - now)
     
     def search(self, query: str = None, file_hash: str = None, 
                languages: str = "es,en", imdb_id: str = None,
                season: int = None, episode: int = None) -> List[Dict]:
         """Busca subtítulos en OpenSubtitles."""
+        # Repetir la misma búsqueda (re-soltar la carpeta, reintentos) no vuelve a la red
+        cache_key = (query, file_hash, languages, imdb_id, season, episode)
+        with self._cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < self.SEARCH_CACHE_TTL:
+                self._search_cache.move_to_end(cache_key)
+                return list(cached[1])
+        
         params = {'languages': languages}
         
         if query:
@@ -107,16 +213,25 @@ class OpenSubtitlesAPI:
             params['episode_number'] = episode
         
         try:
-            response = requests.get(
-                f"{self.base_url}/subtitles",
-                params=params,
-                headers=self._headers(),
-                timeout=15
-            )
+            with self._throttle:
+                self._wait_rate_limit()
+                response = self.session.get(
+                    f"{self.base_url}/subtitles",
+                    params=params,
+                    timeout=15
+                )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get('data', [])
+                data = json_loads(response.content)
+                results = data.get('data', [])
+                
+                with self._cache_lock:
+                    self._search_cache[cache_key] = (time.monotonic(), results)
+                    self._search_cache.move_to_end(cache_key)
+                    while len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                        self._search_cache.popitem(last=False)
+                
+                return list(results)
             else:
                 print(f"Error API: {response.status_code} - {response.text[:200]}")
                 return []
@@ -128,15 +243,16 @@ class OpenSubtitlesAPI:
     def download(self, file_id: int) -> Optional[str]:
         """Obtiene el link de descarga de un subtítulo."""
         try:
-            response = requests.post(
-                f"{self.base_url}/download",
-                json={'file_id': file_id},
-                headers=self._headers(),
-                timeout=15
-            )
+            with self._throttle:
+                self._wait_rate_limit()
+                response = self.session.post(
+                    f"{self.base_url}/download",
+                    data=json_dumps({'file_id': file_id}),
+                    timeout=15
+                )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 return data.get('link')
             else:
                 print(f"Error descarga: {response.status_code}")
@@ -152,11 +268,31 @@ class SubliminalFallback:
     
     PROVIDERS = ['gestdown', 'podnapisi', 'tvsubtitles']
     
+    # Pools de proveedores abiertos a la vez (ProviderPool no es thread-safe)
+    POOL_SIZE = 2
+    
+    def __init__(self):
+        # Pocos pools abiertos y reusados por cualquier hilo (búsquedas de la
+        # interfaz, descargas y el lote) en vez de un pool por hilo
+        self._pools = PoolQueue(
+            lambda: ProviderPool(providers=self.PROVIDERS).__enter__(),
+            lambda pool: pool.__exit__(None, None, None),
+            size=self.POOL_SIZE,
+            # ProviderPool descarta para siempre un proveedor que falla una vez:
+            # los descartes se olvidan en cada uso para que un timeout aislado
+            # no deje afuera al proveedor en los videos siguientes
+            reset=lambda pool: pool.discarded_providers.clear(),
+        )
+    
+    def close(self):
+        """Cierra las sesiones de los proveedores."""
+        self._pools.close()
+    
     def search_for_video(self, video_path: str, languages: str = "es,en") -> List[Dict]:
         """Busca subtítulos para un archivo de video usando Subliminal."""
         results = []
         
-        if not SUBLIMINAL_AVAILABLE:
+        if not subliminal_available():
             print("Subliminal no disponible")
             return results
         
@@ -173,26 +309,26 @@ class SubliminalFallback:
                     lang_set.add(BabelLanguage('eng'))
             
             # Buscar con múltiples proveedores
-            with ProviderPool(providers=self.PROVIDERS) as pool:
+            with self._pools.checkout() as pool:
                 subs = pool.list_subtitles(video, lang_set)
+            
+            for sub in subs[:15]:
+                lang_code = 'es' if sub.language == BabelLanguage('spa') else 'en'
+                release = getattr(sub, 'release', '') or getattr(sub, 'releases', [''])[0] if hasattr(sub, 'releases') else str(sub.id)[:50]
+                
+                results.append({
+                    'provider': f'Subliminal ({sub.provider_name})',
+                    'attributes': {
+                        'release': release[:100],
+                        'language': lang_code,
+                        'download_count': 0,
+                        'fps': '-',
+                        'files': [{'file_id': None}],
+                    },
+                    '_subliminal_sub': sub,
+                    '_subliminal_video': video,
+                })
                 
-                for sub in subs[:15]:
-                    lang_code = 'es' if sub.language == BabelLanguage('spa') else 'en'
-                    release = getattr(sub, 'release', '') or getattr(sub, 'releases', [''])[0] if hasattr(sub, 'releases') else str(sub.id)[:50]
-                    
-                    results.append({
-                        'provider': f'Subliminal ({sub.provider_name})',
-                        'attributes': {
-                            'release': release[:100],
-                            'language': lang_code,
-                            'download_count': 0,
-                            'fps': '-',
-                            'files': [{'file_id': None}],
-                        },
-                        '_subliminal_sub': sub,
-                        '_subliminal_video': video,
-                    })
-                    
         except Exception as e:
             print(f"Error Subliminal: {e}")
         
@@ -200,7 +336,7 @@ class SubliminalFallback:
     
     def download(self, subtitle_data: Dict, destination: str) -> Optional[bytes]:
         """Descarga un subtítulo usando Subliminal."""
-        if not SUBLIMINAL_AVAILABLE:
+        if not subliminal_available():
             return None
         
         try:
@@ -210,7 +346,7 @@ class SubliminalFallback:
             if not sub or not video:
                 return None
             
-            with ProviderPool(providers=self.PROVIDERS) as pool:
+            with self._pools.checkout() as pool:
                 pool.download_subtitle(sub)
             
             if sub.content:
@@ -226,6 +362,14 @@ class SubliminalFallback:
 class SubtitleDownloaderApp:
     """Aplicación principal para descargar subtítulos."""
     
+    # Columna del treeview -> atributo usado para ordenar
+    SORT_KEYS = {
+        'Release': 'release',
+        'Idioma': 'language',
+        'Descargas': 'download_count',
+        'FPS': 'fps',
+    }
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Subtitle Downloader")
@@ -246,6 +390,13 @@ class SubtitleDownloaderApp:
         self.current_results: List[Dict] = []
         self.current_video_path: str = None
         self.auto_mode = tk.BooleanVar(value=True)  # Modo automático activado por defecto
+        self._sub_index: Dict[str, Set[str]] = {}  # Carpeta -> nombres de archivo (minúsculas)
+        self._sub_status: Dict[str, bool] = {}  # Video -> ya tiene subtítulo
+        
+        # Estado pendiente de mostrar (los hilos lo publican cada STATUS_FLUSH_MS)
+        self._pending_status: Optional[str] = None
+        self._status_flush_scheduled = False
+        self._status_lock = threading.Lock()
         
         # Configurar UI
         self._setup_ui()
@@ -263,19 +414,13 @@ class SubtitleDownloaderApp:
     
     def _on_drop(self, event):
         """Maneja el evento de soltar archivos/carpetas."""
-        # Obtener la ruta (puede venir con llaves si tiene espacios)
-        path = event.data
-        if path.startswith('{') and path.endswith('}'):
-            path = path[1:-1]
+        # TkDnD entrega una lista de rutas; las que tienen espacios vienen entre llaves
+        paths = [braced or plain for braced, plain in _DND_SPLIT.findall(event.data)]
+        if not paths:
+            return
         
         # Si son múltiples archivos, tomar el primero
-        if ' ' in path and not os.path.exists(path):
-            paths = path.split()
-            for p in paths:
-                p = p.strip('{}')
-                if os.path.exists(p):
-                    path = p
-                    break
+        path = paths[0]
         
         if os.path.isdir(path):
             self.folder_path.set(path)
@@ -283,7 +428,7 @@ class SubtitleDownloaderApp:
             
             # Si modo automático está activado, descargar todo
             if self.auto_mode.get():
-                videos_sin_sub = [v for v in self.video_files if not self._has_subtitle(v)]
+                videos_sin_sub = [v for v in self.video_files if not self._sub_status[v]]
                 if videos_sin_sub:
                     self.status_text.set(f"🚀 Iniciando descarga automática de {len(videos_sin_sub)} subtítulos...")
                     thread = threading.Thread(target=self._do_download_all, args=(videos_sin_sub,))
@@ -398,26 +543,49 @@ class SubtitleDownloaderApp:
         
         self.video_files = get_video_files(folder)
         
+        # Releer la carpeta: puede haber subtítulos nuevos
+        self._sub_index.pop(_folder_key(folder), None)
+        
+        # Guardar el estado para no recalcularlo en el modo automático
+        self._sub_status = {vf: self._has_subtitle(vf) for vf in self.video_files}
+        items = [
+            ("✓ " if self._sub_status[vf] else "  ") + os.path.basename(vf)
+            for vf in self.video_files
+        ]
+        
+        # Un solo insert con todos los items: una llamada a Tcl en vez de una por video
         self.video_listbox.delete(0, tk.END)
-        for vf in self.video_files:
-            filename = os.path.basename(vf)
-            has_sub = self._has_subtitle(vf)
-            prefix = "✓ " if has_sub else "  "
-            self.video_listbox.insert(tk.END, prefix + filename)
+        if items:
+            self.video_listbox.insert(tk.END, *items)
         
         self.status_text.set(f"Se encontraron {len(self.video_files)} videos")
     
+    def _folder_names(self, folder: str) -> Set[str]:
+        """Nombres de archivo (en minúsculas) de una carpeta, cacheados por carpeta."""
+        key = _folder_key(folder)
+        names = self._sub_index.get(key)
+        if names is None:
+            try:
+                with os.scandir(folder) as entries:
+                    names = {entry.name.lower() for entry in entries}
+            except OSError:
+                names = set()
+            self._sub_index[key] = names
+        return names
+    
     def _has_subtitle(self, video_path: str) -> bool:
         video = Path(video_path)
-        for ext in SUBTITLE_EXTENSIONS:
-            if video.with_suffix(ext).exists():
-                return True
-            # También verificar con sufijo de idioma
-            for lang in ['.es', '.en', '.spa', '.eng']:
-                sub_name = video.stem + lang + ext
-                if (video.parent / sub_name).exists():
-                    return True
-        return False
+        names = self._folder_names(str(video.parent))
+        stem = video.stem.lower()
+        
+        # Mismo nombre que el video, o con sufijo de idioma
+        candidates = {stem + ext for ext in SUBTITLE_EXTENSIONS}
+        candidates.update(
+            stem + lang + ext
+            for ext in SUBTITLE_EXTENSIONS
+            for lang in SUBTITLE_LANG_SUFFIXES
+        )
+        return not names.isdisjoint(candidates)
     
     def _on_video_select(self, event):
         selection = self.video_listbox.curselection()
@@ -429,29 +597,20 @@ class SubtitleDownloaderApp:
     
     
     def _sort_column(self, col: str):
-        """Ordena el treeview por la columna clickeada."""
-        # Obtener todos los items
-        items = [(self.results_tree.set(item, col), item) for item in self.results_tree.get_children('')]
-        
-        # Determinar si es numérico
-        try:
-            # Intentar convertir a número para ordenar numéricamente
-            items = [(int(val) if val.isdigit() else float(val) if val.replace('.', '').isdigit() else val, item) 
-                     for val, item in items]
-            numeric = True
-        except (ValueError, AttributeError):
-            numeric = False
-        
-        # Ordenar
+        """Ordena los resultados por la columna clickeada."""
+        key = self.SORT_KEYS[col]
         reverse = self.sort_reverse[col]
-        items.sort(key=lambda x: x[0] if numeric else str(x[0]).lower(), reverse=reverse)
         
-        # Reordenar items en el treeview
-        for index, (_, item) in enumerate(items):
-            self.results_tree.move(item, '', index)
+        def sort_key(sub: Dict):
+            value = sub.get('attributes', {}).get(key, '')
+            # Valores numéricos ordenados como números, el resto como texto
+            if isinstance(value, (int, float)):
+                return (0, value, '')
+            return (1, 0, str(value).lower())
         
-        # También reordenar current_results para que coincida
-        new_order = [self.results_tree.index(item) for _, item in items]
+        # Ordenar la lista de respaldo y redibujar el treeview de una vez
+        self.current_results.sort(key=sort_key, reverse=reverse)
+        self._update_results_tree(self.current_results)
         
         # Toggle el orden para la próxima vez
         self.sort_reverse[col] = not reverse
@@ -483,36 +642,10 @@ class SubtitleDownloaderApp:
         self._update_status(f"Calculando hash de: {video_name}...")
         file_hash = get_file_hash(video_path)
         
-        # Parsear nombre para query alternativa
-        info = parse_video_filename(video_name)
-        query = build_search_query(info)
-        
         self._update_status(f"Buscando subtítulos...")
-        
-        results = []
-        
-        # 1. OpenSubtitles - Búsqueda por hash (más precisa)
-        if file_hash and OPENSUBTITLES_API_KEY:
-            self._update_status(f"[OpenSubtitles] Buscando por hash...")
-            results = self.opensubtitles.search(
-                file_hash=file_hash,
-                languages=self.lang_var.get()
-            )
-        
-        # 2. OpenSubtitles - Búsqueda por nombre
-        if not results and OPENSUBTITLES_API_KEY:
-            self._update_status(f"[OpenSubtitles] Buscando: {query}...")
-            results = self.opensubtitles.search(
-                query=query,
-                languages=self.lang_var.get(),
-                season=info.get('season'),
-                episode=info.get('episode')
-            )
-        
-        # 3. FALLBACK: Subliminal (múltiples proveedores)
-        if not results and SUBLIMINAL_AVAILABLE:
-            self._update_status(f"[Subliminal] Buscando con proveedores alternativos...")
-            results = self.subliminal.search_for_video(video_path, self.lang_var.get())
+        results = self._find_subtitles(
+            video_path, file_hash, self.lang_var.get(), status=self._update_status, concurrent=True
+        )
         
         self.current_results = results
         self._update_results_tree(results)
@@ -527,8 +660,10 @@ class SubtitleDownloaderApp:
     
     def _update_results_tree(self, results: List[Dict]):
         def update():
-            for item in self.results_tree.get_children():
-                self.results_tree.delete(item)
+            # Borrar todas las filas en una sola llamada
+            children = self.results_tree.get_children()
+            if children:
+                self.results_tree.delete(*children)
             
             for idx, sub in enumerate(results):
                 attrs = sub.get('attributes', {})
@@ -589,27 +724,7 @@ class SubtitleDownloaderApp:
         
         self._update_status(f"Descargando de {provider}...")
         
-        content = None
-        
-        # Descargar según el proveedor
-        if 'Subliminal' in provider:
-            # Subliminal tiene su propio sistema de descarga
-            video_dir = str(Path(self.current_video_path).parent)
-            content = self.subliminal.download(subtitle, video_dir)
-        else:
-            # OpenSubtitles
-            files = attrs.get('files', [])
-            if files:
-                file_id = files[0].get('file_id')
-                if file_id:
-                    download_link = self.opensubtitles.download(file_id)
-                    if download_link:
-                        try:
-                            response = requests.get(download_link, timeout=30)
-                            if response.status_code == 200:
-                                content = response.content
-                        except:
-                            pass
+        content = self._download_content(subtitle, self.current_video_path)
         
         if not content:
             self._update_status("Error: No se pudo descargar el subtítulo")
@@ -628,8 +743,7 @@ class SubtitleDownloaderApp:
             sub_name = f"{video.stem}.{language}.srt"
             sub_path = video.parent / sub_name
             
-            with open(sub_path, 'wb') as f:
-                f.write(content)
+            write_chunks(sub_path, [content])
             
             self._update_status(f"✓ Descargado: {sub_name}")
             self._show_message("Éxito", f"Subtítulo descargado:\n{sub_name}")
@@ -643,21 +757,67 @@ class SubtitleDownloaderApp:
         
         self._stop_progress()
     
+    def _download_content(self, subtitle: Dict, video_path: str) -> Optional[bytes]:
+        """Descarga el contenido de un subtítulo según su proveedor."""
+        attrs = subtitle.get('attributes', {})
+        provider = subtitle.get('provider', 'OpenSubtitles')
+        
+        if 'Subliminal' in provider:
+            # Subliminal tiene su propio sistema de descarga
+            video_dir = str(Path(video_path).parent)
+            return self.subliminal.download(subtitle, video_dir)
+        
+        # OpenSubtitles
+        files = attrs.get('files', [])
+        if not files:
+            return None
+        
+        file_id = files[0].get('file_id')
+        if not file_id:
+            return None
+        
+        download_link = self.opensubtitles.download(file_id)
+        if not download_link:
+            return None
+        
+        try:
+            # El link es del CDN: no enviarle la API key de la sesión
+            response = self.opensubtitles.session.get(
+                download_link,
+                headers={'Api-Key': None, 'Content-Type': None},
+                timeout=30
+            )
+            if response.status_code == 200:
+                return response.content
+        except:
+            pass
+        
+        return None
+    
     def _extract_subtitle_content(self, content: bytes) -> bytes:
-        """Extrae el contenido del subtítulo si viene en zip."""
-        import zipfile
-        import io
+        """Extrae el contenido del subtítulo si viene en zip o gzip."""
+        # Texto plano (BOM UTF-8 o índice de SRT): no hay nada que extraer
+        if content.startswith(UTF8_BOM) or content[:1].isdigit():
+            return content
         
-        # Verificar si es un ZIP
-        if content[:4] == b'PK\x03\x04':
+        if content.startswith(ZIP_MAGIC):
             try:
+                # BytesIO sobre bytes comparte el buffer (no copia el payload)
                 with zipfile.ZipFile(io.BytesIO(content)) as zf:
-                    for name in zf.namelist():
-                        if name.endswith('.srt'):
-                            return zf.read(name)
-                    # Si no hay .srt, tomar el primer archivo
-                    if zf.namelist():
-                        return zf.read(zf.namelist()[0])
+                    names = zf.namelist()
+                    # Preferir un .srt; si no hay, tomar el primer archivo
+                    name = next(
+                        (n for n in names if n.lower().endswith('.srt')),
+                        names[0] if names else None
+                    )
+                    if name:
+                        return zf.read(name)
+            except:
+                pass
+        
+        elif content.startswith(GZIP_MAGIC):
+            try:
+                return gzip.decompress(content)
             except:
                 pass
         
@@ -668,6 +828,9 @@ class SubtitleDownloaderApp:
             messagebox.showwarning("Aviso", "Primero carga una carpeta con videos")
             return
         
+        # Releer las carpetas: pudo haber subtítulos nuevos desde que se cargaron
+        for folder in {os.path.dirname(v) for v in self.video_files}:
+            self._sub_index.pop(_folder_key(folder), None)
         videos_sin_sub = [v for v in self.video_files if not self._has_subtitle(v)]
         
         if not videos_sin_sub:
@@ -684,66 +847,105 @@ class SubtitleDownloaderApp:
             thread.daemon = True
             thread.start()
     
+    def _find_subtitles(self, video_path: str, file_hash: Optional[str], languages: str,
+                        status: Optional[Callable[[str], None]] = None,
+                        concurrent: bool = False) -> List[Dict]:
+        """
+        Busca subtítulos para un video siguiendo el orden de fallback.
+        
+        Con concurrent=True (búsqueda desde la interfaz) la búsqueda por nombre
+        sale junto con la de hash en vez de esperar a que esta falle: cuesta un
+        pedido más a la API pero ahorra una ida y vuelta. El lote no lo usa, para
+        no gastar dos pedidos por video.
+        """
+        status = status or (lambda text: None)
+        results = []
+        
+        by_name = None
+        if concurrent and file_hash and OPENSUBTITLES_API_KEY:
+            executor = ThreadPoolExecutor(max_workers=1)
+            by_name = executor.submit(self._search_by_name, video_path, languages)
+            # No se espera: el hilo termina solo cuando vuelve la respuesta
+            executor.shutdown(wait=False)
+        
+        # 1. OpenSubtitles por hash
+        if file_hash and OPENSUBTITLES_API_KEY:
+            if by_name is not None:
+                status("[OpenSubtitles] Buscando por hash y por nombre...")
+            else:
+                status("[OpenSubtitles] Buscando por hash...")
+            results = self.opensubtitles.search(file_hash=file_hash, languages=languages)
+        
+        # 2. OpenSubtitles por nombre: si ya salió en paralelo se usa su respuesta;
+        # si no, solo se busca (y se parsea el nombre) cuando el hash no dio resultados
+        if not results and OPENSUBTITLES_API_KEY:
+            if by_name is not None:
+                results = by_name.result()
+            else:
+                results = self._search_by_name(video_path, languages, status)
+        
+        # 3. Fallback: Subliminal
+        if not results and subliminal_available():
+            status("[Subliminal] Buscando con proveedores alternativos...")
+            results = self.subliminal.search_for_video(video_path, languages)
+        
+        return results
+    
+    def _search_by_name(self, video_path: str, languages: str,
+                        status: Optional[Callable[[str], None]] = None) -> List[Dict]:
+        """Busca en OpenSubtitles por el título (y temporada/episodio) del nombre del video."""
+        info = parse_video_filename(os.path.basename(video_path))
+        query = build_search_query(info)
+        if status:
+            status(f"[OpenSubtitles] Buscando: {query}...")
+        return self.opensubtitles.search(
+            query=query,
+            languages=languages,
+            season=info.get('season'),
+            episode=info.get('episode')
+        )
+    
+    def _fetch_best_subtitle(self, video_path: str, file_hash: Optional[str],
+                             languages: str) -> Tuple[Optional[Dict], Optional[bytes]]:
+        """Busca y descarga el mejor subtítulo para un video."""
+        results = self._find_subtitles(video_path, file_hash, languages)
+        if not results:
+            return None, None
+        
+        sub = results[0]
+        return sub, self._download_content(sub, video_path)
+    
     def _do_download_all(self, videos: List[str]):
         self._start_progress()
         total = len(videos)
         downloaded = 0
+        languages = self.lang_var.get()
         
-        for i, video_path in enumerate(videos):
-            video_name = os.path.basename(video_path)
-            self._update_status(f"[{i+1}/{total}] Procesando: {video_name}")
+        self._update_status(f"Calculando hashes de {total} videos...")
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, total))) as executor:
+            # Los hashes se leen en paralelo para solapar el I/O de disco
+            hashes = list(executor.map(get_file_hash, videos))
             
-            try:
-                # Buscar por hash
-                file_hash = get_file_hash(video_path)
-                info = parse_video_filename(video_name)
-                query = build_search_query(info)
-                languages = self.lang_var.get()
-                
-                results = []
-                
-                # 1. OpenSubtitles por hash
-                if file_hash and OPENSUBTITLES_API_KEY:
-                    results = self.opensubtitles.search(file_hash=file_hash, languages=languages)
-                
-                # 2. OpenSubtitles por nombre
-                if not results and OPENSUBTITLES_API_KEY:
-                    results = self.opensubtitles.search(
-                        query=query,
-                        languages=languages,
-                        season=info.get('season'),
-                        episode=info.get('episode')
-                    )
-                
-                # 3. Fallback: Subliminal
-                if not results and SUBLIMINAL_AVAILABLE:
-                    results = self.subliminal.search_for_video(video_path, languages)
+            # Búsqueda y descarga (red) de todos los videos se solapan en el pool
+            fetches = {
+                executor.submit(self._fetch_best_subtitle, video_path, file_hash, languages): video_path
+                for video_path, file_hash in zip(videos, hashes)
+            }
+            
+            # Se guarda cada subtítulo apenas termina su descarga, desde este
+            # único hilo para evitar carreras en los nombres
+            for i, fetch in enumerate(as_completed(fetches)):
+                video_path = fetches[fetch]
+                video_name = os.path.basename(video_path)
+                self._update_status(f"[{i+1}/{total}] Procesando: {video_name}")
                 
-                if results:
-                    sub = results[0]
-                    attrs = sub.get('attributes', {})
-                    provider = sub.get('provider', 'OpenSubtitles')
-                    
-                    content = None
-                    
-                    # Descargar según proveedor
-                    if 'Subliminal' in provider:
-                        video_dir = str(Path(video_path).parent)
-                        content = self.subliminal.download(sub, video_dir)
-                    else:
-                        files = attrs.get('files', [])
-                        if files:
-                            file_id = files[0].get('file_id')
-                            if file_id:
-                                download_link = self.opensubtitles.download(file_id)
-                                if download_link:
-                                    response = requests.get(download_link, timeout=30)
-                                    if response.status_code == 200:
-                                        content = response.content
+                try:
+                    sub, content = fetch.result()
                     
                     if content:
                         video = Path(video_path)
-                        language = attrs.get('language', 'es')
+                        language = sub.get('attributes', {}).get('language', 'es')
                         
                         # Extraer si es zip
                         content = self._extract_subtitle_content(content)
@@ -751,13 +953,12 @@ class SubtitleDownloaderApp:
                         sub_name = f"{video.stem}.{language}.srt"
                         sub_path = video.parent / sub_name
                         
-                        with open(sub_path, 'wb') as f:
-                            f.write(content)
+                        write_chunks(sub_path, [content])
                         
                         downloaded += 1
                                 
-            except Exception as e:
-                print(f"Error con {video_name}: {e}")
+                except Exception as e:
+                    print(f"Error con {video_name}: {e}")
         
         self._update_status(f"✓ Completado: {downloaded}/{total} subtítulos descargados")
         self._show_message("Completado", f"Se descargaron {downloaded} de {total} subtítulos")
@@ -765,7 +966,20 @@ class SubtitleDownloaderApp:
         self._stop_progress()
     
     def _update_status(self, text: str):
-        self.root.after(0, lambda: self.status_text.set(text))
+        # Agrupa las actualizaciones: una sola llamada a Tk por intervalo,
+        # mostrando el último mensaje
+        with self._status_lock:
+            self._pending_status = text
+            if self._status_flush_scheduled:
+                return
+            self._status_flush_scheduled = True
+        self.root.after(STATUS_FLUSH_MS, self._flush_status)
+    
+    def _flush_status(self):
+        with self._status_lock:
+            text = self._pending_status
+            self._status_flush_scheduled = False
+        self.status_text.set(text)
     
     def _start_progress(self):
         self.root.after(0, self.progress.start)
@@ -1,5 +1,6 @@
 """Configuración de la aplicación."""
 import os
+import sys
 from pathlib import Path
 
 # Cargar variables de entorno desde .env si existe
@@ -13,3 +14,18 @@ except ImportError:
 # OpenSubtitles API
 OPENSUBTITLES_API_KEY = os.getenv('OPENSUBTITLES_API_KEY', '')
 API_URL = "https://api.opensubtitles.com/api/v1"
+
+
+def _user_cache_dir() -> Path:
+    """Carpeta de cache del usuario según el sistema operativo."""
+    if os.name == 'nt':
+        base = os.getenv('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Caches'
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'subs_lat'
+
+
+# Cache local (por usuario)
+CACHE_DIR = _user_cache_dir()
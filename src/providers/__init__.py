@@ -1,4 +1,4 @@
-from .base import SubtitleProvider
+from .base import SubtitleProvider, search_providers, search_providers_async
 from .subdivx import SubDivXProvider
 from .opensubtitles import OpenSubtitlesProvider
 from .subscene import SubsceneProvider
@@ -7,5 +7,5 @@ from .yify import YifyProvider
 from .subdl import SubdlProvider
 from .tusubtitulo import TuSubtituloProvider
 
-__all__ = ['SubtitleProvider', 'SubDivXProvider', 'OpenSubtitlesProvider', 'SubsceneProvider', 
+__all__ = ['SubtitleProvider', 'search_providers', 'search_providers_async', 'SubDivXProvider', 'OpenSubtitlesProvider', 'SubsceneProvider', 
            'ArgenteamProvider', 'YifyProvider', 'SubdlProvider', 'TuSubtituloProvider']
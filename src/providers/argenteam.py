@@ -1,12 +1,24 @@
 """Proveedor de subtítulos Argenteam - Excelente para español latino."""
-import re
-import os
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
 from urllib.parse import urljoin, quote
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from lxml import etree
+
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_response, node_text, has_class,
+                   response_filename)
+
+# Expresiones XPath compiladas una sola vez al importar el módulo
+# Selectores de resultados, del más probable al menos probable
+_RESULT_SELECTORS = (
+    etree.XPath(f'//div[{has_class("result-item")}]'),
+    etree.XPath(f'//div[{has_class("movie-item")}]'),
+    etree.XPath('//article'),
+)
+_LINKS = etree.XPath('//a[@href]')
+_DOWNLOAD_BUTTON = etree.XPath(
+    f'(//a[{has_class("download-btn")}] | //a[{has_class("btn-download")}]'
+    ' | //a[contains(@href, "subtitles")])[1]'
+)
 
 
 class ArgenteamProvider(SubtitleProvider):
@@ -16,6 +28,9 @@ class ArgenteamProvider(SubtitleProvider):
     supported_languages = [Language.SPANISH_LATAM]
     BASE_URL = "https://argenteam.net"
     
+    def __init__(self):
+        self.session = self._create_session(cached=True)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en Argenteam."""
         results = []
@@ -24,44 +39,59 @@ class ArgenteamProvider(SubtitleProvider):
             search_url = f"{self.BASE_URL}/search"
             params = {'q': query}
             
-            response = requests.get(
+            response = self.session.get(
                 search_url,
                 params=params,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Buscar resultados de películas/series
-            for item in soup.select('div.result-item, div.movie-item, article'):
-                try:
-                    link = item.find('a', href=True)
-                    if not link:
-                        continue
-                    
-                    href = link.get('href', '')
-                    if '/episode/' not in href and '/movie/' not in href and '/subtitles/' not in href:
+            tree = parse_response(response)
+            
+            # Buscar resultados de películas/series: se prueba cada selector en
+            # orden y se corta apenas uno da resultados o se llega a 15
+            for selector in _RESULT_SELECTORS:
+                for item in selector(tree):
+                    try:
+                        # Una sola pasada: primer link y primer encabezado/span
+                        link = None
+                        heading = None
+                        for elem in item.iterdescendants('a', 'h2', 'h3', 'h4', 'span'):
+                            if elem.tag == 'a':
+                                if link is None and elem.get('href') is not None:
+                                    link = elem
+                            elif heading is None:
+                                heading = elem
+                            if link is not None and heading is not None:
+                                break
+                        if link is None:
+                            continue
+                        
+                        href = link.get('href', '')
+                        if '/episode/' not in href and '/movie/' not in href and '/subtitles/' not in href:
+                            continue
+                        
+                        title = node_text(link)
+                        if not title:
+                            title = node_text(heading) if heading is not None else "Sin título"
+                        
+                        detail_url = urljoin(self.BASE_URL, href)
+                        
+                        result = SubtitleResult(
+                            title=title,
+                            language=Language.SPANISH_LATAM,
+                            provider=self.name,
+                            download_url=detail_url,
+                            description="",
+                        )
+                        results.append(result)
+                        if len(results) >= 15:
+                            break
+                        
+                    except Exception:
                         continue
-                    
-                    title = link.get_text(strip=True)
-                    if not title:
-                        title_elem = item.find(['h2', 'h3', 'h4', 'span'])
-                        title = title_elem.get_text(strip=True) if title_elem else "Sin título"
-                    
-                    detail_url = urljoin(self.BASE_URL, href)
-                    
-                    result = SubtitleResult(
-                        title=title,
-                        language=Language.SPANISH_LATAM,
-                        provider=self.name,
-                        download_url=detail_url,
-                        description="",
-                    )
-                    results.append(result)
-                    
-                except Exception:
-                    continue
+                
+                if results:
+                    break
             
             # Si no encontramos en búsqueda, intentar en API
             if not results:
@@ -79,10 +109,9 @@ class ArgenteamProvider(SubtitleProvider):
             api_url = f"{self.BASE_URL}/api/v1/search"
             params = {'q': query}
             
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 params=params,
-                headers=self._get_headers(),
                 timeout=15
             )
             
@@ -106,51 +135,41 @@ class ArgenteamProvider(SubtitleProvider):
     def download(self, subtitle: SubtitleResult, destination: str) -> Optional[str]:
         """Descarga un subtítulo de Argenteam."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 subtitle.download_url,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Buscar link de descarga
             download_link = None
-            for a in soup.find_all('a', href=True):
+            for a in _LINKS(tree):
                 href = a.get('href', '')
                 if 'download' in href.lower() or '.srt' in href or '.zip' in href:
                     download_link = urljoin(self.BASE_URL, href)
                     break
             
             if not download_link:
-                btn = soup.select_one('a.download-btn, a.btn-download, a[href*="subtitles"]')
-                if btn:
-                    download_link = urljoin(self.BASE_URL, btn.get('href', ''))
+                btns = _DOWNLOAD_BUTTON(tree)
+                if btns:
+                    download_link = urljoin(self.BASE_URL, btns[0].get('href', ''))
             
             if not download_link:
                 return None
             
             # Descargar
-            dl_response = requests.get(
-                download_link,
-                headers=self._get_headers(),
-                timeout=30,
-                allow_redirects=True
-            )
-            
-            filename = "subtitle.srt"
-            content_disp = dl_response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
-            
-            filepath = os.path.join(destination, filename)
+            with self._uncached():
+                dl_response = self.session.get(
+                    download_link,
+                    timeout=30,
+                    allow_redirects=True,
+                    stream=True
+                )
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
+            filename = response_filename(dl_response, "subtitle.srt")
             
-            return filepath
+            return self._save_download(dl_response, destination, filename)
             
         except Exception as e:
             print(f"Error descargando de Argenteam: {e}")
@@ -1,9 +1,222 @@
 """Clase base para proveedores de subtítulos."""
+import os
+import asyncio
+import shutil
+import socket
+import tempfile
+import threading
+import zipfile
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Callable, List, Optional, Union
+from urllib.parse import urljoin
 from enum import Enum
 
+import requests
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection
+
+from ..config import CACHE_DIR
+from ..utils.file_utils import extract_subtitle_from_zip, write_chunks
+
+# requests-cache (en requirements.txt) cachea en disco las búsquedas repetidas;
+# si no está instalado, se revalida en memoria con RevalidatingSession
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+# Cache de respuestas HTTP de los proveedores, en la carpeta de cache del usuario
+HTTP_CACHE_PATH = os.path.join(CACHE_DIR, 'http_cache')
+HTTP_CACHE_TTL = 3600  # segundos
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter cuyos sockets usan TCP keep-alive además de TCP_NODELAY.
+    
+    Las conexiones ociosas del pool siguen vivas entre búsquedas, evitando
+    repetir DNS, handshake TCP y TLS en cada request.
+    """
+    
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', self.SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+class RevalidatingSession(requests.Session):
+    """
+    Sesión que revalida en memoria los GET con ETag / Last-Modified.
+    
+    Se usa cuando requests-cache no está instalado: guarda las últimas
+    MAX_ENTRIES páginas que el servidor marcó con validadores y las vuelve
+    a pedir con If-None-Match / If-Modified-Since; ante un 304 (sin cuerpo)
+    devuelve la respuesta guardada. Los pedidos con stream=True (descargas)
+    no se guardan.
+    """
+    
+    MAX_ENTRIES = 64
+    
+    def __init__(self):
+        super().__init__()
+        self._pages: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pages_lock = threading.Lock()
+        self._disabled = threading.local()
+    
+    @contextmanager
+    def cache_disabled(self):
+        """Contexto en el que este hilo no usa ni guarda páginas."""
+        self._disabled.value = True
+        try:
+            yield
+        finally:
+            self._disabled.value = False
+    
+    def send(self, request, **kwargs):
+        if (request.method != 'GET' or kwargs.get('stream')
+                or getattr(self._disabled, 'value', False)):
+            return super().send(request, **kwargs)
+        
+        url = request.url
+        with self._pages_lock:
+            entry = self._pages.get(url)
+        if entry is not None:
+            etag, last_modified, cached = entry
+            if etag:
+                request.headers['If-None-Match'] = etag
+            if last_modified:
+                request.headers['If-Modified-Since'] = last_modified
+        
+        response = super().send(request, **kwargs)
+        
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            with self._pages_lock:
+                if url in self._pages:
+                    self._pages.move_to_end(url)
+            return cached
+        
+        etag = response.headers.get('ETag', '')
+        last_modified = response.headers.get('Last-Modified', '')
+        if response.status_code == 200 and (etag or last_modified):
+            response.content  # Cargar el cuerpo antes de compartir la respuesta
+            with self._pages_lock:
+                self._pages[url] = (etag, last_modified, response)
+                self._pages.move_to_end(url)
+                while len(self._pages) > self.MAX_ENTRIES:
+                    self._pages.popitem(last=False)
+        
+        return response
+
+
+def parse_html(markup: Union[str, bytes], encoding: Optional[str] = None) -> lxml_html.HtmlElement:
+    """
+    Parsea un documento HTML con lxml.
+    
+    Un documento vacío devuelve un árbol vacío en vez de fallar, igual que
+    hacía BeautifulSoup.
+    
+    Args:
+        markup: HTML como texto o como bytes sin decodificar
+        encoding: Encoding de los bytes; si es None, libxml2 lo detecta
+            (por ejemplo desde <meta charset>)
+    """
+    if isinstance(markup, str) and markup.lstrip().startswith('<?xml'):
+        # lxml no acepta str con declaración de encoding
+        markup = markup.encode('utf-8')
+    parser = lxml_html.HTMLParser(encoding=encoding) if encoding and isinstance(markup, bytes) else None
+    try:
+        return lxml_html.document_fromstring(markup, parser=parser)
+    except etree.ParserError:
+        return lxml_html.document_fromstring('<html></html>')
+
+
+def parse_response(response: requests.Response) -> lxml_html.HtmlElement:
+    """
+    Parsea el HTML de una respuesta directamente desde sus bytes.
+    
+    Evita la decodificación a str de response.text; solo se fuerza el
+    encoding si el servidor lo declara en Content-Type.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    encoding = response.encoding if 'charset=' in content_type.lower() else None
+    return parse_html(response.content, encoding)
+
+
+def is_html_response(response: requests.Response) -> bool:
+    """Indica si la respuesta es exitosa (2xx/3xx) y su Content-Type es HTML."""
+    return response.ok and 'html' in response.headers.get('Content-Type', '').lower()
+
+
+def safe_filename(name: Optional[str], default: str) -> str:
+    """
+    Nombre base de un archivo informado por un servidor.
+    
+    Descarta cualquier carpeta (con / o \\) para que el servidor no pueda
+    escribir fuera de la carpeta de destino.
+    
+    Args:
+        name: Nombre recibido del servidor
+        default: Nombre a usar si no queda uno válido
+        
+    Returns:
+        El nombre del archivo
+    """
+    filename = os.path.basename((name or '').replace('\\', '/').strip())
+    return default if filename in ('', '.', '..') else filename
+
+
+def response_filename(response: requests.Response, default: str) -> str:
+    """
+    Nombre de archivo informado en el Content-Disposition de una respuesta.
+    
+    Se parsea a mano (sin regex) y se queda solo con el nombre base, para que
+    un servidor no pueda escribir fuera de la carpeta de destino.
+    
+    Args:
+        response: Respuesta de la descarga
+        default: Nombre a usar si el servidor no informa uno válido
+        
+    Returns:
+        El nombre del archivo
+    """
+    content_disp = response.headers.get('Content-Disposition', '')
+    start = content_disp.find('filename=')
+    if start < 0:
+        return default
+    
+    value = content_disp[start + len('filename='):]
+    if value.startswith('"'):
+        value = value[1:]
+    for stop in ('"', ';', '\n'):
+        value = value.split(stop, 1)[0]
+    
+    return safe_filename(value, default)
+
+
+# Firma de la primera entrada de un .zip
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+def has_class(name: str) -> str:
+    """Condición XPath equivalente al selector CSS .name."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def node_text(node) -> str:
+    """Texto de un nodo y sus descendientes, sin espacios sobrantes (como get_text(strip=True))."""
+    return ''.join(part.strip() for part in node.itertext())
+
 
 class Language(Enum):
     SPANISH_SPAIN = "es-ES"
@@ -21,6 +234,7 @@ class SubtitleResult:
     description: str = ""
     downloads: int = 0
     rating: float = 0.0
+    direct_download_url: str = ""  # Link de descarga ya resuelto al parsear (opcional)
     
     def __str__(self):
         return f"[{self.provider}] {self.title} ({self.language.value})"
@@ -31,6 +245,18 @@ class SubtitleProvider(ABC):
     
     name: str = "Base Provider"
     supported_languages: List[Language] = []
+    session: Optional[requests.Session] = None
+    BASE_URL: str = ""
+    
+    # Headers comunes, construidos una sola vez
+    _HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    }
+    STREAM_CHUNK_SIZE = 64 * 1024
+    ZIP_SPOOL_SIZE = 64 * 1024 * 1024
+    MAX_PAGE_WORKERS = 5
     
     @abstractmethod
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
@@ -60,10 +286,278 @@ class SubtitleProvider(ABC):
         """
         pass
     
+    async def search_async(self, query: str, language: Optional[Language] = None,
+                           executor: Optional[Executor] = None) -> List[SubtitleResult]:
+        """
+        Versión async de search: corre la búsqueda bloqueante en un hilo.
+        
+        Args:
+            query: Término de búsqueda (nombre de película/serie)
+            language: Idioma deseado (opcional)
+            executor: Executor compartido (por defecto, el del event loop)
+            
+        Returns:
+            Lista de SubtitleResult
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.search, query, language)
+    
+    def _absolute_url(self, href: str) -> str:
+        """
+        Resuelve un href contra BASE_URL.
+        
+        Los casos comunes (URL absoluta o ruta que empieza con "/") se resuelven
+        concatenando, sin el urlparse de urljoin; el resto sigue usando urljoin.
+        """
+        if href.startswith(('http://', 'https://')):
+            return href
+        if href.startswith('/') and not href.startswith('//'):
+            return self.BASE_URL + href
+        return urljoin(self.BASE_URL + '/', href)
+    
     def _get_headers(self) -> dict:
-        """Headers comunes para requests."""
-        return {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-        }
+        """Headers comunes para requests (dict compartido, no modificar)."""
+        return self._HEADERS
+    
+    def _create_session(self, headers: Optional[dict] = None,
+                        pool_connections: int = 10, pool_maxsize: int = 20,
+                        cached: bool = False, retries: int = 0) -> requests.Session:
+        """
+        Crea una sesión HTTP que reutiliza conexiones (keep-alive) entre requests.
+        
+        Args:
+            headers: Headers por defecto de la sesión (por defecto _get_headers())
+            pool_connections: Cantidad de hosts con pool propio
+            pool_maxsize: Conexiones máximas por host
+            cached: Cachear en disco las respuestas GET (sin requests-cache, revalidar en memoria)
+            retries: Reintentos ante errores de conexión (con backoff)
+            
+        Returns:
+            La sesión configurada
+        """
+        if cached and REQUESTS_CACHE_AVAILABLE:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            session = requests_cache.CachedSession(
+                HTTP_CACHE_PATH,
+                backend='sqlite',
+                expire_after=HTTP_CACHE_TTL,
+                allowable_methods=('GET',),
+                cache_control=True,
+            )
+        elif cached:
+            session = RevalidatingSession()
+        else:
+            session = requests.Session()
+        session.headers.update(self._get_headers() if headers is None else headers)
+        
+        adapter = KeepAliveAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=retries, backoff_factor=0.3) if retries else 0,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def _save_download(self, response: requests.Response, destination: str, filename: str) -> str:
+        """
+        Guarda una descarga pedida con stream=True; los .zip se extraen al vuelo.
+        
+        El .zip se acumula en un SpooledTemporaryFile (en memoria salvo que
+        supere ZIP_SPOOL_SIZE) y de ahí se extrae el primer subtítulo, sin
+        escribir ni releer el .zip desde disco. Si no contiene subtítulos, o
+        el contenido no es realmente un .zip (un .rar o un .srt servido con
+        ese nombre o como application/gzip), se guarda el archivo tal cual.
+        
+        Args:
+            response: Respuesta obtenida con stream=True
+            destination: Carpeta donde guardar
+            filename: Nombre de archivo informado por el servidor
+            
+        Returns:
+            Ruta al subtítulo (o archivo) guardado
+        """
+        content_type = response.headers.get('Content-Type', '').lower()
+        if not filename.lower().endswith('.zip') and 'zip' not in content_type:
+            return self._stream_to_file(response, os.path.join(destination, filename))
+        
+        with tempfile.SpooledTemporaryFile(max_size=self.ZIP_SPOOL_SIZE) as buffer:
+            try:
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, buffer, self.STREAM_CHUNK_SIZE)
+            finally:
+                response.close()
+            
+            buffer.seek(0)
+            # El nombre y el Content-Type no alcanzan: se confirma la firma
+            if buffer.read(len(ZIP_MAGIC)) == ZIP_MAGIC:
+                buffer.seek(0)
+                try:
+                    subtitle_path = extract_subtitle_from_zip(buffer, destination)
+                except zipfile.BadZipFile:
+                    subtitle_path = None
+                if subtitle_path:
+                    return subtitle_path
+            
+            buffer.seek(0)
+            filepath = os.path.join(destination, filename)
+            return write_chunks(filepath, iter(lambda: buffer.read(self.STREAM_CHUNK_SIZE), b''))
+    
+    def _fetch_pages(self, urls: List[str], timeout: int = 15) -> List[Optional[requests.Response]]:
+        """
+        Descarga varias páginas a la vez con la sesión del proveedor.
+        
+        Las descargas son de red y corren en hilos (hasta MAX_PAGE_WORKERS);
+        el parseo queda a cargo del llamador, en orden. Los hilos comparten el
+        pool keep-alive de la sesión, así que solo el primer lote abre
+        conexiones nuevas (HTTP/1.1: una por hilo concurrente).
+        
+        Args:
+            urls: Páginas a descargar
+            timeout: Timeout de cada request
+            
+        Returns:
+            Respuestas en el mismo orden que urls (None si el request falló)
+        """
+        if not urls:
+            return []
+        
+        def fetch(url: str) -> Optional[requests.Response]:
+            try:
+                return self.session.get(url, timeout=timeout)
+            except requests.RequestException as e:
+                print(f"Error obteniendo página de {self.name}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.MAX_PAGE_WORKERS)) as executor:
+            return list(executor.map(fetch, urls))
+    
+    def _collect_pages(self, urls: List[str],
+                       parse: Callable[[requests.Response, int], List['SubtitleResult']],
+                       limit: int = 15) -> List['SubtitleResult']:
+        """
+        Junta resultados de varias páginas descargadas en tandas paralelas.
+        
+        Las páginas se piden de a MAX_PAGE_WORKERS con _fetch_pages y se
+        parsean en orden; se corta apenas hay `limit` resultados, sin pedir
+        las tandas siguientes.
+        
+        Args:
+            urls: Páginas a descargar
+            parse: Recibe la respuesta y cuántos resultados faltan; devuelve los de esa página
+            limit: Máximo de resultados
+            
+        Returns:
+            Hasta `limit` resultados, en el orden de urls
+        """
+        results = []
+        for start in range(0, len(urls), self.MAX_PAGE_WORKERS):
+            for page in self._fetch_pages(urls[start:start + self.MAX_PAGE_WORKERS]):
+                if page is not None:
+                    results.extend(parse(page, limit - len(results)))
+                if len(results) >= limit:
+                    return results[:limit]
+        return results
+    
+    def _uncached(self):
+        """Contexto en el que la sesión no usa la cache (para descargas)."""
+        if hasattr(self.session, 'cache_disabled'):
+            return self.session.cache_disabled()
+        return nullcontext()
+    
+    def _stream_to_file(self, response: requests.Response, filepath: str) -> str:
+        """
+        Escribe el cuerpo de una respuesta pedida con stream=True directo a disco.
+        
+        Los bytes pasan del socket al archivo en bloques de STREAM_CHUNK_SIZE,
+        sin cargar el archivo completo en memoria, y se escriben con os.write
+        sobre el descriptor (sin la capa de buffer de Python).
+        
+        Args:
+            response: Respuesta obtenida con stream=True
+            filepath: Ruta del archivo a escribir
+            
+        Returns:
+            La misma ruta del archivo
+        """
+        try:
+            # iter_content descomprime gzip/deflate de transporte igual que response.content
+            return write_chunks(filepath, response.iter_content(self.STREAM_CHUNK_SIZE))
+        finally:
+            response.close()
+    
+    def close(self):
+        """Cierra las conexiones abiertas por el proveedor."""
+        if self.session is not None:
+            self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def search_providers(providers: List[SubtitleProvider], query: str,
+                     language: Optional[Language] = None,
+                     max_workers: Optional[int] = None) -> List[SubtitleResult]:
+    """
+    Busca en varios proveedores a la vez.
+    
+    Las búsquedas son de red, así que cada proveedor corre en su propio hilo
+    y el tiempo total pasa a ser el del proveedor más lento, no la suma.
+    
+    Args:
+        providers: Proveedores a consultar
+        query: Término de búsqueda
+        language: Idioma deseado (opcional)
+        max_workers: Hilos máximos (por defecto, uno por proveedor)
+        
+    Returns:
+        Resultados de todos los proveedores, en el orden de la lista
+    """
+    if not providers:
+        return []
+    
+    def run(provider: SubtitleProvider) -> List[SubtitleResult]:
+        try:
+            return provider.search(query, language)
+        except Exception as e:
+            print(f"Error buscando en {provider.name}: {e}")
+            return []
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or len(providers)) as executor:
+        for provider_results in executor.map(run, providers):
+            results.extend(provider_results)
+    
+    return results
+
+
+async def search_providers_async(providers: List[SubtitleProvider], query: str,
+                                 language: Optional[Language] = None,
+                                 executor: Optional[Executor] = None) -> List[SubtitleResult]:
+    """
+    Versión async de search_providers: lanza todos los proveedores con gather.
+    
+    Args:
+        providers: Proveedores a consultar
+        query: Término de búsqueda
+        language: Idioma deseado (opcional)
+        executor: Executor compartido (por defecto, el del event loop)
+        
+    Returns:
+        Resultados de todos los proveedores, en el orden de la lista
+    """
+    async def run(provider: SubtitleProvider) -> List[SubtitleResult]:
+        try:
+            return await provider.search_async(query, language, executor)
+        except Exception as e:
+            print(f"Error buscando en {provider.name}: {e}")
+            return []
+    
+    results = []
+    for provider_results in await asyncio.gather(*(run(p) for p in providers)):
+        results.extend(provider_results)
+    
+    return results
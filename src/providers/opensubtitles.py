@@ -1,10 +1,10 @@
 """Proveedor de subtítulos OpenSubtitles - API REST."""
 import os
 import re
-import requests
 from typing import List, Optional
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from .base import SubtitleProvider, SubtitleResult, Language, safe_filename
+from ..utils.jsonio import json_loads, json_dumps
 
 
 class OpenSubtitlesProvider(SubtitleProvider):
@@ -21,6 +21,12 @@ class OpenSubtitlesProvider(SubtitleProvider):
         Language.ENGLISH: "en",
     }
     
+    # Código de idioma de la API -> Language (cualquier otro es español latino)
+    _REV_LANG = {
+        'en': Language.ENGLISH,
+        'es': Language.SPANISH_LATAM,
+    }
+    
     def __init__(self, api_key: str = "", username: str = "", password: str = ""):
         """
         Inicializa el proveedor.
@@ -34,17 +40,25 @@ class OpenSubtitlesProvider(SubtitleProvider):
         self.username = username
         self.password = password
         self.token = None
+        self._api_headers = None
+        self._api_headers_token = None
+        
+        # Headers de la API fijos en la sesión; login() agrega el token
+        self.session = self._create_session(headers=self._get_api_headers(), cached=True)
     
     def _get_api_headers(self) -> dict:
-        """Headers para la API."""
-        headers = {
-            'Api-Key': self.api_key,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SubtitleDownloader v1.0',
-        }
-        if self.token:
-            headers['Authorization'] = f'Bearer {self.token}'
-        return headers
+        """Headers para la API (se reconstruyen solo si cambia el token)."""
+        if self._api_headers is None or self._api_headers_token != self.token:
+            headers = {
+                'Api-Key': self.api_key,
+                'Content-Type': 'application/json',
+                'User-Agent': 'SubtitleDownloader v1.0',
+            }
+            if self.token:
+                headers['Authorization'] = f'Bearer {self.token}'
+            self._api_headers = headers
+            self._api_headers_token = self.token
+        return self._api_headers
     
     def login(self) -> bool:
         """Autentica con la API para obtener un token."""
@@ -52,19 +66,19 @@ class OpenSubtitlesProvider(SubtitleProvider):
             return False
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.API_URL}/login",
-                json={
+                data=json_dumps({
                     'username': self.username,
                     'password': self.password,
-                },
-                headers=self._get_api_headers(),
+                }),
                 timeout=15
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 self.token = data.get('token')
+                self.session.headers.update(self._get_api_headers())
                 return True
                 
         except Exception as e:
@@ -90,10 +104,9 @@ class OpenSubtitlesProvider(SubtitleProvider):
             else:
                 params['languages'] = 'es,en'
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.API_URL}/subtitles",
                 params=params,
-                headers=self._get_api_headers(),
                 timeout=15
             )
             
@@ -101,18 +114,14 @@ class OpenSubtitlesProvider(SubtitleProvider):
                 print(f"Error OpenSubtitles API: {response.status_code}")
                 return results
             
-            data = response.json()
+            data = json_loads(response.content)
             
             for item in data.get('data', []):
                 try:
-                    attributes = item.get('attributes', {})
+                    attributes = item['attributes']
                     
                     # Determinar idioma
-                    lang_code = attributes.get('language', 'es')
-                    if lang_code == 'en':
-                        lang = Language.ENGLISH
-                    else:
-                        lang = Language.SPANISH_LATAM
+                    lang = self._REV_LANG.get(attributes.get('language'), Language.SPANISH_LATAM)
                     
                     # Obtener info del archivo
                     files = attributes.get('files', [])
@@ -132,6 +141,10 @@ class OpenSubtitlesProvider(SubtitleProvider):
                     )
                     results.append(result)
                     
+                    # Solo se devuelven 15: no procesar el resto de la página
+                    if len(results) >= 15:
+                        break
+                    
                 except Exception:
                     continue
                     
@@ -147,10 +160,9 @@ class OpenSubtitlesProvider(SubtitleProvider):
         
         try:
             # Solicitar link de descarga
-            response = requests.post(
+            response = self.session.post(
                 f"{self.API_URL}/download",
-                json={'file_id': int(subtitle.download_url)},
-                headers=self._get_api_headers(),
+                data=json_dumps({'file_id': int(subtitle.download_url)}),
                 timeout=15
             )
             
@@ -158,22 +170,26 @@ class OpenSubtitlesProvider(SubtitleProvider):
                 print(f"Error obteniendo link: {response.status_code}")
                 return None
             
-            data = response.json()
+            data = json_loads(response.content)
             download_link = data.get('link')
             
             if not download_link:
                 return None
             
             # Descargar archivo
-            dl_response = requests.get(download_link, timeout=30)
+            with self._uncached():
+                # El link es del CDN: no enviarle las credenciales de la API
+                dl_response = self.session.get(
+                    download_link,
+                    headers={'Api-Key': None, 'Authorization': None},
+                    timeout=30,
+                    stream=True
+                )
             
-            filename = data.get('file_name', 'subtitle.srt')
+            filename = safe_filename(data.get('file_name'), 'subtitle.srt')
             filepath = os.path.join(destination, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
-            
-            return filepath
+            return self._stream_to_file(dl_response, filepath)
             
         except Exception as e:
             print(f"Error descargando de OpenSubtitles: {e}")
@@ -1,8 +1,7 @@
 """Proveedor de subtítulos SubDivX - Especializado en español latino."""
 import re
-import os
 import time
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from urllib.parse import urljoin, quote_plus
 
@@ -14,8 +13,22 @@ except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
 import requests
+from lxml import etree
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_html, parse_response, node_text, has_class,
+                   response_filename)
+
+# Patrones y expresiones XPath compilados una sola vez al importar el módulo
+_DOWNLOADS_RE = re.compile(r'(\d+)\s*downloads?', re.IGNORECASE)
+_LOCATION_RE = re.compile(r"location\.href='([^']+)'")
+_TITLES_BY_ID = etree.XPath('//div[@id="menu_titulo_buscador"]')
+_TITLES_BY_CLASS = etree.XPath(f'//div[{has_class("titulo_menu_izq")}]')
+_SUBS_LINKS = etree.XPath('//a[contains(@href, "/subs/")]')
+_LINKS = etree.XPath('//a[@href]')
+_ONCLICK_ELEMS = etree.XPath('//a[@onclick] | //input[@onclick]')
+
+# Marcas de la página de desafío de Cloudflare
+_CHALLENGE_MARKERS = (b'cf-chl', b'challenge-platform', b'Just a moment')
 
 
 class SubDivXProvider(SubtitleProvider):
@@ -24,14 +37,27 @@ class SubDivXProvider(SubtitleProvider):
     name = "SubDivX"
     supported_languages = [Language.SPANISH_LATAM, Language.SPANISH_SPAIN]
     BASE_URL = "https://www.subdivx.com"
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     
     def __init__(self):
         self.playwright = None
         self.browser = None
+        self.context = None
         self.cookies = {}
+        # Sesión HTTP que reutiliza las cookies obtenidas por el navegador
+        self.session = self._create_session()
+        self.session.headers['User-Agent'] = self.USER_AGENT
+        # Los objetos de la API sync de Playwright quedan atados al hilo que
+        # llamó a start(): todo el trabajo con el navegador corre en este hilo
+        self._browser_executor = self._new_browser_executor()
+    
+    @staticmethod
+    def _new_browser_executor() -> ThreadPoolExecutor:
+        """Hilo único dueño del navegador (se crea recién al primer uso)."""
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix='subdivx-browser')
     
     def _init_browser(self):
-        """Inicializa el navegador si es necesario."""
+        """Inicializa el navegador y su contexto si es necesario."""
         if not PLAYWRIGHT_AVAILABLE:
             return False
         
@@ -42,8 +68,11 @@ class SubDivXProvider(SubtitleProvider):
                     headless=True,
                     args=['--disable-blink-features=AutomationControlled']
                 )
+                # Un único contexto: conserva las cookies de Cloudflare entre llamadas
+                self.context = self.browser.new_context(user_agent=self.USER_AGENT)
             except Exception as e:
                 print(f"Error iniciando navegador: {e}")
+                self._close_browser()
                 return False
         
         return True
@@ -51,15 +80,74 @@ class SubDivXProvider(SubtitleProvider):
     def _close_browser(self):
         """Cierra el navegador."""
         try:
+            if self.context:
+                self.context.close()
             if self.browser:
                 self.browser.close()
             if self.playwright:
                 self.playwright.stop()
         except:
             pass
+        self.context = None
         self.browser = None
         self.playwright = None
     
+    def _render(self, url: str, wait_ms: int) -> Optional[str]:
+        """
+        Navega a una página con Playwright y devuelve su HTML.
+        
+        Solo se llama desde el hilo de _browser_executor (ver _browse).
+        """
+        if not self._init_browser():
+            return None
+        
+        page = self.context.new_page()
+        try:
+            page.goto(url, wait_until='networkidle', timeout=30000)
+            page.wait_for_timeout(wait_ms)
+            
+            html = page.content()
+            # Cookies para los pedidos HTTP y descargas posteriores
+            self._update_cookies()
+        finally:
+            page.close()
+        
+        return html
+    
+    def _browse(self, url: str, wait_ms: int) -> Optional[str]:
+        """HTML de una página renderizada en el hilo del navegador, sea cual sea el hilo que llama."""
+        return self._browser_executor.submit(self._render, url, wait_ms).result()
+    
+    def _update_cookies(self):
+        """Actualiza las cookies guardadas con las del contexto del navegador."""
+        self.cookies.update({c['name']: c['value'] for c in self.context.cookies()})
+        self.session.cookies.update(self.cookies)
+    
+    def _fetch_page(self, url: str):
+        """
+        Obtiene y parsea una página de SubDivX.
+        
+        Primero intenta con la sesión HTTP y las cookies ya capturadas; solo si
+        Cloudflare bloquea el pedido navega con Playwright.
+        """
+        if self.cookies:
+            try:
+                response = self.session.get(url, timeout=15)
+                if response.status_code not in (403, 503) and \
+                        not any(marker in response.content for marker in _CHALLENGE_MARKERS):
+                    return parse_response(response)
+            except requests.RequestException:
+                pass
+        
+        if not PLAYWRIGHT_AVAILABLE:
+            return None
+        
+        html = self._browse(url, 1500)
+        if html is None:
+            return None
+        
+        return parse_html(html)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en SubDivX usando Playwright para bypass de Cloudflare."""
         results = []
@@ -68,61 +156,43 @@ class SubDivXProvider(SubtitleProvider):
             print("SubDivX: Playwright no instalado. Ejecutar: pip install playwright && playwright install chromium")
             return results
         
-        if not self._init_browser():
-            return results
-        
         try:
-            context = self.browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            page = context.new_page()
-            
             # Construir URL de búsqueda
             search_url = f"{self.BASE_URL}/index.php?buscar2={quote_plus(query)}&acession=1&oxdown=1"
             
-            # Navegar
-            page.goto(search_url, wait_until='networkidle', timeout=30000)
-            
-            # Esperar un poco para que cargue todo
-            page.wait_for_timeout(2000)
-            
-            # Obtener cookies para descargas posteriores
-            self.cookies = {c['name']: c['value'] for c in context.cookies()}
+            # Navegar y esperar un poco para que cargue todo
+            html = self._browse(search_url, 2000)
             
             # Parsear contenido
-            html = page.content()
-            soup = BeautifulSoup(html, 'lxml')
-            
-            results = self._parse_results(soup)
-            
-            context.close()
+            if html is not None:
+                results = self._parse_results(parse_html(html))
             
         except Exception as e:
             print(f"Error buscando en SubDivX: {e}")
         
         return results[:15]
     
-    def _parse_results(self, soup: BeautifulSoup) -> List[SubtitleResult]:
+    def _parse_results(self, tree) -> List[SubtitleResult]:
         """Parsea los resultados de búsqueda."""
         results = []
         
         # Selector 1: divs con id menu_titulo_buscador
-        for titulo in soup.find_all('div', id='menu_titulo_buscador'):
+        for titulo in _TITLES_BY_ID(tree):
             result = self._extract_result(titulo)
             if result:
                 results.append(result)
         
         # Selector 2: divs con clase titulo_menu_izq
         if not results:
-            for titulo in soup.select('div.titulo_menu_izq'):
+            for titulo in _TITLES_BY_CLASS(tree):
                 result = self._extract_result(titulo)
                 if result:
                     results.append(result)
         
         # Selector 3: links directos
         if not results:
-            for link in soup.find_all('a', href=re.compile(r'/subs/')):
-                title = link.get_text(strip=True)
+            for link in _SUBS_LINKS(tree):
+                title = node_text(link)
                 if title:
                     results.append(SubtitleResult(
                         title=title,
@@ -137,24 +207,34 @@ class SubDivXProvider(SubtitleProvider):
     def _extract_result(self, element) -> Optional[SubtitleResult]:
         """Extrae un resultado de un elemento HTML."""
         try:
-            link = element.find('a')
-            if not link:
+            link = element.find('.//a')
+            if link is None:
                 return None
             
-            title = link.get_text(strip=True)
+            title = node_text(link)
             detail_url = urljoin(self.BASE_URL, link.get('href', ''))
             
-            # Descripción
-            desc_div = element.find_next('div', id='buscador_detalle')
-            if not desc_div:
-                desc_div = element.find_next('div', class_='buscador_detalle')
-            description = desc_div.get_text(strip=True)[:200] if desc_div else ""
+            # Descripción y descargas: una sola pasada por los hermanos
+            # siguientes, hasta el título del próximo resultado
+            desc_div = None
+            dl_div = None
+            for sib in element.itersiblings():
+                sib_id = sib.get('id') or ''
+                if sib_id == 'menu_titulo_buscador':
+                    break
+                if desc_div is None and (sib_id == 'buscador_detalle' or
+                                         'buscador_detalle' in (sib.get('class') or '').split()):
+                    desc_div = sib
+                elif dl_div is None and sib_id == 'buscador_detalle_sub':
+                    dl_div = sib
+                if desc_div is not None and dl_div is not None:
+                    break
+            
+            description = node_text(desc_div)[:200] if desc_div is not None else ""
             
-            # Descargas
             downloads = 0
-            dl_div = element.find_next('div', id='buscador_detalle_sub')
-            if dl_div:
-                match = re.search(r'(\d+)\s*[Dd]ownloads?', dl_div.get_text())
+            if dl_div is not None:
+                match = _DOWNLOADS_RE.search(dl_div.text_content())
                 if match:
                     downloads = int(match.group(1))
             
@@ -171,28 +251,16 @@ class SubDivXProvider(SubtitleProvider):
     
     def download(self, subtitle: SubtitleResult, destination: str) -> Optional[str]:
         """Descarga un subtítulo de SubDivX."""
-        if not PLAYWRIGHT_AVAILABLE:
-            return None
-        
-        if not self._init_browser():
-            return None
-        
         try:
-            context = self.browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            page = context.new_page()
-            
             # Ir a la página del subtítulo
-            page.goto(subtitle.download_url, wait_until='networkidle', timeout=30000)
-            page.wait_for_timeout(1500)
+            tree = self._fetch_page(subtitle.download_url)
+            if tree is None:
+                return None
             
             # Buscar link de descarga
-            html = page.content()
-            soup = BeautifulSoup(html, 'lxml')
             
             download_link = None
-            for a in soup.find_all('a', href=True):
+            for a in _LINKS(tree):
                 href = a.get('href', '')
                 if 'baession' in href or 'descargar' in href.lower():
                     download_link = urljoin(self.BASE_URL, href)
@@ -200,49 +268,38 @@ class SubDivXProvider(SubtitleProvider):
             
             if not download_link:
                 # Buscar por onclick
-                for elem in soup.find_all(['a', 'input'], onclick=True):
+                for elem in _ONCLICK_ELEMS(tree):
                     onclick = elem.get('onclick', '')
-                    match = re.search(r"location\.href='([^']+)'", onclick)
+                    match = _LOCATION_RE.search(onclick)
                     if match:
                         download_link = urljoin(self.BASE_URL, match.group(1))
                         break
             
             if not download_link:
-                context.close()
                 return None
             
-            # Obtener cookies del contexto
-            cookies = {c['name']: c['value'] for c in context.cookies()}
-            context.close()
-            
-            # Descargar usando requests con las cookies
-            response = requests.get(
+            # Descargar usando la sesión con las cookies del navegador
+            response = self.session.get(
                 download_link,
-                cookies=cookies,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
                 timeout=30,
-                allow_redirects=True
+                allow_redirects=True,
+                stream=True
             )
             
             # Determinar nombre del archivo
-            filename = "subtitle.zip"
-            content_disp = response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
-            
-            filepath = os.path.join(destination, filename)
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            filename = response_filename(response, "subtitle.zip")
             
-            return filepath
+            return self._save_download(response, destination, filename)
             
         except Exception as e:
             print(f"Error descargando de SubDivX: {e}")
             return None
     
-    def __del__(self):
-        """Limpieza al destruir el objeto."""
-        self._close_browser()
+    def close(self):
+        """Cierra el navegador y la sesión HTTP."""
+        # El navegador se cierra en su propio hilo; el ejecutor nuevo no abre
+        # ningún hilo hasta que se vuelva a usar
+        executor, self._browser_executor = self._browser_executor, self._new_browser_executor()
+        executor.submit(self._close_browser).result()
+        executor.shutdown(wait=True)
+        super().close()
@@ -1,12 +1,37 @@
 """Proveedor de subtítulos Subdl - Acceso libre, multi-idioma."""
 import re
 import os
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
-from urllib.parse import urljoin, quote
+from urllib.parse import quote
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from lxml import etree
+
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_response, node_text, has_class,
+                   is_html_response, response_filename)
+
+# Patrones y expresiones XPath compilados una sola vez al importar el módulo
+_SXXEYY_RE = re.compile(r'S\d+E\d+')
+_SLUG_STRIP_RE = re.compile(r'[^a-z0-9-]')
+_RESULT_LINKS = etree.XPath(
+    f'//a[{has_class("subtitle-item")}] | //div[{has_class("result")}]//a'
+    ' | //a[contains(@href, "/subtitles/")]'
+)
+_SUBTITLE_ROWS = etree.XPath(
+    f'//tr | //div[{has_class("subtitle-row")}] | //li[{has_class("subtitle-item")}]'
+)
+# Link de descarga directa dentro de una fila de resultados
+_ROW_DIRECT_LINK = etree.XPath(
+    f'(.//*[@data-download-url]/@data-download-url | .//a[{has_class("download")}]/@href'
+    ' | .//a[contains(@href, "/download/")]/@href)[1]',
+    smart_strings=False
+)
+# Texto completo de un nodo, como str simple (sin "smart strings" de lxml)
+_ROW_TEXT = etree.XPath('string()', smart_strings=False)
+# Primer link cuyo href o texto contiene "download" (sin distinguir mayúsculas)
+_DOWNLOAD_LINK = etree.XPath(
+    '(//a[@href][contains(translate(@href, "DOWNLOAD", "download"), "download")'
+    ' or contains(translate(string(.), "DOWNLOAD", "download"), "download")])[1]'
+)
 
 
 class SubdlProvider(SubtitleProvider):
@@ -22,49 +47,57 @@ class SubdlProvider(SubtitleProvider):
         Language.ENGLISH: 'english',
     }
     
+    # Nombre de idioma buscado en las filas -> Language detectado
+    _LANG_DETECT = {
+        'spanish': Language.SPANISH_LATAM,
+        'español': Language.SPANISH_LATAM,
+        'english': Language.ENGLISH,
+    }
+    
+    def __init__(self):
+        self.session = self._create_session(retries=2, cached=True)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en Subdl."""
         results = []
         
         try:
             # Limpiar query
-            clean_query = re.sub(r'S\d+E\d+', '', query).strip()
+            clean_query = _SXXEYY_RE.sub('', query).strip()
             
             search_url = f"{self.BASE_URL}/search"
             params = {'query': clean_query}
             
-            response = requests.get(
+            response = self.session.get(
                 search_url,
                 params=params,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Buscar resultados (links a páginas de subtítulos)
-            for item in soup.select('a.subtitle-item, div.result a, a[href*="/subtitles/"]'):
+            page_urls = []
+            for item in _RESULT_LINKS(tree):
                 try:
                     href = item.get('href', '')
                     if not href or '/subtitles/' not in href:
                         continue
                     
-                    title = item.get_text(strip=True)
+                    title = node_text(item)
                     if not title:
                         continue
                     
-                    page_url = urljoin(self.BASE_URL, href)
-                    
-                    # Obtener subtítulos de esta página
-                    subs = self._get_subtitles_from_page(page_url, language)
-                    results.extend(subs)
-                    
-                    if len(results) >= 15:
-                        break
+                    page_urls.append(self._absolute_url(href))
                         
                 except Exception:
                     continue
             
+            # Obtener subtítulos de las páginas
+            results = self._collect_pages(page_urls, lambda page, limit: self._parse_subtitles_page(
+                parse_response(page), language, limit=limit
+            ))
+            
             # Si no encontramos resultados en la búsqueda, intentar búsqueda directa
             if not results:
                 results = self._search_direct(clean_query, language)
@@ -81,40 +114,37 @@ class SubdlProvider(SubtitleProvider):
         try:
             # Construir URL slug del título
             slug = query.lower().replace(' ', '-')
-            slug = re.sub(r'[^a-z0-9-]', '', slug)
+            slug = _SLUG_STRIP_RE.sub('', slug)
             
             url = f"{self.BASE_URL}/subtitles/{slug}"
             
-            response = requests.get(
+            # stream=True: si no es HTML (p. ej. un error en JSON) no se lee el cuerpo
+            response = self.session.get(
                 url,
-                headers=self._get_headers(),
-                timeout=15
+                timeout=15,
+                stream=True
             )
             
-            if response.status_code == 200:
-                results = self._get_subtitles_from_page(url, language)
+            with response:
+                if is_html_response(response):
+                    results = self._parse_subtitles_page(parse_response(response), language)
                 
         except Exception:
             pass
         
         return results
     
-    def _get_subtitles_from_page(self, page_url: str, language: Optional[Language] = None) -> List[SubtitleResult]:
-        """Obtiene subtítulos de una página."""
+    def _parse_subtitles_page(self, tree, language: Optional[Language] = None,
+                              limit: int = 15) -> List[SubtitleResult]:
+        """Obtiene hasta `limit` subtítulos del árbol HTML de una página."""
         results = []
         
         try:
-            response = requests.get(
-                page_url,
-                headers=self._get_headers(),
-                timeout=15
-            )
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            
             # Obtener título
-            title_elem = soup.find('h1') or soup.find('h2')
-            page_title = title_elem.get_text(strip=True) if title_elem else "Sin título"
+            title_elem = tree.find('.//h1')
+            if title_elem is None:
+                title_elem = tree.find('.//h2')
+            page_title = node_text(title_elem) if title_elem is not None else "Sin título"
             
             # Idiomas a buscar
             target_langs = []
@@ -123,36 +153,48 @@ class SubdlProvider(SubtitleProvider):
             else:
                 target_langs = ['spanish', 'english', 'español']
             
+            # (nombre, abreviatura, Language) de cada idioma, calculados una
+            # sola vez por página y no por fila
+            lang_tokens = [
+                (tl, tl[:3], self._LANG_DETECT.get(tl, Language.ENGLISH))
+                for tl in target_langs
+            ]
+            
             # Buscar filas de subtítulos
-            for row in soup.select('tr, div.subtitle-row, li.subtitle-item'):
+            for row in _SUBTITLE_ROWS(tree):
+                if len(results) >= limit:
+                    break
                 try:
                     # Verificar idioma
-                    row_text = row.get_text().lower()
-                    lang_ok = False
-                    detected_lang = Language.ENGLISH
+                    row_text = _ROW_TEXT(row).lower()
+                    detected_lang = None
                     
-                    for tl in target_langs:
-                        if tl in row_text or tl[:3] in row_text:
-                            lang_ok = True
-                            if 'spanish' in tl or 'español' in tl:
-                                detected_lang = Language.SPANISH_LATAM
+                    for name, abbrev, lang in lang_tokens:
+                        if name in row_text or abbrev in row_text:
+                            detected_lang = lang
                             break
                     
-                    if not lang_ok and target_langs:
-                        continue
+                    if detected_lang is None:
+                        if lang_tokens:
+                            continue
+                        detected_lang = Language.ENGLISH
                     
                     # Buscar link de descarga
-                    link = row.find('a', href=True)
-                    if not link:
+                    link = row.find('.//a[@href]')
+                    if link is None:
                         continue
                     
                     href = link.get('href', '')
-                    sub_title = link.get_text(strip=True)
+                    sub_title = node_text(link)
                     
                     if not sub_title or sub_title == '':
                         sub_title = page_title
                     
-                    download_url = urljoin(self.BASE_URL, href)
+                    download_url = self._absolute_url(href)
+                    
+                    # Si la fila ya trae el link de descarga, se guarda para
+                    # no tener que visitar la página del subtítulo
+                    direct = _ROW_DIRECT_LINK(row)
                     
                     result = SubtitleResult(
                         title=sub_title[:100],
@@ -160,6 +202,7 @@ class SubdlProvider(SubtitleProvider):
                         provider=self.name,
                         download_url=download_url,
                         description="",
+                        direct_download_url=self._absolute_url(direct[0]) if direct else "",
                     )
                     results.append(result)
                     
@@ -175,47 +218,37 @@ class SubdlProvider(SubtitleProvider):
         """Descarga un subtítulo de Subdl."""
         try:
             # Si el URL ya es de descarga directa
-            if '/download/' in subtitle.download_url or subtitle.download_url.endswith(('.zip', '.srt')):
+            if subtitle.direct_download_url:
+                download_url = subtitle.direct_download_url
+            elif '/download/' in subtitle.download_url or subtitle.download_url.endswith(('.zip', '.srt')):
                 download_url = subtitle.download_url
             else:
                 # Ir a la página del subtítulo
-                response = requests.get(
+                response = self.session.get(
                     subtitle.download_url,
-                    headers=self._get_headers(),
                     timeout=15
                 )
                 
-                soup = BeautifulSoup(response.text, 'lxml')
+                tree = parse_response(response)
                 
                 # Buscar botón de descarga
-                download_btn = None
-                for a in soup.find_all('a', href=True):
-                    href = a.get('href', '')
-                    text = a.get_text().lower()
-                    if 'download' in href.lower() or 'download' in text:
-                        download_btn = a
-                        break
-                
-                if not download_btn:
+                hits = _DOWNLOAD_LINK(tree)
+                if not hits:
                     return None
                 
-                download_url = urljoin(self.BASE_URL, download_btn.get('href', ''))
+                download_url = self._absolute_url(hits[0].get('href', ''))
             
             # Descargar
-            dl_response = requests.get(
-                download_url,
-                headers=self._get_headers(),
-                timeout=30,
-                allow_redirects=True
-            )
+            with self._uncached():
+                dl_response = self.session.get(
+                    download_url,
+                    timeout=30,
+                    allow_redirects=True,
+                    stream=True
+                )
             
             # Determinar nombre
-            filename = "subtitle.zip"
-            content_disp = dl_response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
+            filename = response_filename(dl_response, "subtitle.zip")
             
             # Si es texto plano, guardar como .srt
             content_type = dl_response.headers.get('Content-Type', '')
@@ -224,10 +257,7 @@ class SubdlProvider(SubtitleProvider):
             
             filepath = os.path.join(destination, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
-            
-            return filepath
+            return self._stream_to_file(dl_response, filepath)
             
         except Exception as e:
             print(f"Error descargando de Subdl: {e}")
@@ -1,5 +1,7 @@
 """Proveedor usando Subliminal - Biblioteca especializada en subtítulos."""
 import os
+import asyncio
+from functools import lru_cache
 from typing import List, Optional
 from pathlib import Path
 
@@ -13,6 +15,19 @@ except ImportError:
     SUBLIMINAL_AVAILABLE = False
 
 from .base import SubtitleProvider, SubtitleResult, Language
+from ..utils.pools import PoolQueue
+
+
+@lru_cache(maxsize=64)
+def _scan_video_cached(video_path: str, mtime_ns: int, size: int):
+    """scan_video memoizado; mtime y tamaño invalidan la entrada si el archivo cambia."""
+    return scan_video(video_path)
+
+
+def _scan_video(video_path: str):
+    """Escanea un video reutilizando el resultado si el archivo no cambió."""
+    st = os.stat(video_path)
+    return _scan_video_cached(video_path, st.st_mtime_ns, st.st_size)
 
 
 class SubliminalProvider(SubtitleProvider):
@@ -27,10 +42,27 @@ class SubliminalProvider(SubtitleProvider):
         Language.ENGLISH: BabelLanguage('eng') if SUBLIMINAL_AVAILABLE else None,
     }
     
+    # Pools de proveedores abiertos a la vez
+    POOL_SIZE = 2
+    
     def __init__(self):
         self.available = SUBLIMINAL_AVAILABLE
         if not self.available:
             print("Subliminal no está instalado. Instalar con: pip install subliminal")
+        
+        # Pocos pools abiertos y reusados por cualquier hilo (ProviderPool no
+        # es thread-safe); los descartes de proveedores se olvidan en cada uso
+        self._pools = PoolQueue(
+            lambda: ProviderPool().__enter__(),
+            lambda pool: pool.__exit__(None, None, None),
+            size=self.POOL_SIZE,
+            reset=lambda pool: pool.discarded_providers.clear(),
+        )
+    
+    def close(self):
+        """Cierra las sesiones de los proveedores de Subliminal."""
+        self._pools.close()
+        super().close()
     
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """
@@ -48,7 +80,7 @@ class SubliminalProvider(SubtitleProvider):
         
         try:
             # Escanear el video
-            video = scan_video(video_path)
+            video = _scan_video(video_path)
             
             # Determinar idiomas
             if language:
@@ -57,31 +89,37 @@ class SubliminalProvider(SubtitleProvider):
                 languages = {BabelLanguage('spa'), BabelLanguage('eng')}
             
             # Buscar subtítulos usando múltiples proveedores
-            with ProviderPool() as pool:
+            with self._pools.checkout() as pool:
                 subtitles = pool.list_subtitles(video, languages)
+            
+            for sub in subtitles[:15]:
+                lang_enum = Language.ENGLISH
+                if sub.language == BabelLanguage('spa'):
+                    lang_enum = Language.SPANISH_LATAM
+                
+                result = SubtitleResult(
+                    title=f"{sub.id} - {sub.provider_name}",
+                    language=lang_enum,
+                    provider=f"Subliminal ({sub.provider_name})",
+                    download_url=str(sub.id),
+                    description=getattr(sub, 'release', ''),
+                )
+                # Guardar referencia al subtítulo original
+                result._subliminal_sub = sub
+                result._subliminal_video = video
+                results.append(result)
                 
-                for sub in subtitles[:15]:
-                    lang_enum = Language.ENGLISH
-                    if sub.language == BabelLanguage('spa'):
-                        lang_enum = Language.SPANISH_LATAM
-                    
-                    result = SubtitleResult(
-                        title=f"{sub.id} - {sub.provider_name}",
-                        language=lang_enum,
-                        provider=f"Subliminal ({sub.provider_name})",
-                        download_url=str(sub.id),
-                        description=getattr(sub, 'release', ''),
-                    )
-                    # Guardar referencia al subtítulo original
-                    result._subliminal_sub = sub
-                    result._subliminal_video = video
-                    results.append(result)
-                    
         except Exception as e:
             print(f"Error buscando con Subliminal: {e}")
         
         return results
     
+    async def search_for_video_async(self, video_path: str,
+                                     language: Optional[Language] = None) -> List[SubtitleResult]:
+        """Versión async de search_for_video: corre la búsqueda bloqueante en un hilo."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.search_for_video, video_path, language)
+    
     def download(self, subtitle: SubtitleResult, destination: str) -> Optional[str]:
         """Descarga un subtítulo usando Subliminal."""
         if not self.available:
@@ -94,7 +132,7 @@ class SubliminalProvider(SubtitleProvider):
             if not sub or not video:
                 return None
             
-            with ProviderPool() as pool:
+            with self._pools.checkout() as pool:
                 pool.download_subtitle(sub)
             
             # Guardar el subtítulo
@@ -139,7 +177,7 @@ def download_subtitles_for_video(video_path: str, languages: List[str] = None, d
                 lang_set.add(BabelLanguage('eng'))
         
         # Escanear video
-        video = scan_video(video_path)
+        video = _scan_video(video_path)
         
         # Descargar mejor subtítulo
         subtitles = download_best_subtitles([video], lang_set)
@@ -1,12 +1,27 @@
 """Proveedor de subtítulos Subscene - Buena cobertura multi-idioma."""
 import os
-import re
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
-from urllib.parse import urljoin, quote
+from urllib.parse import quote
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from lxml import etree
+
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_response, node_text, has_class,
+                   response_filename)
+
+# Expresiones XPath compiladas una sola vez al importar el módulo
+_TITLE_LINKS = etree.XPath(f'//div[{has_class("title")}]//a')
+# Celda de idioma (la primera td.a1 de la fila); solo interesan las filas
+# cuya celda tiene el span del idioma y el link al subtítulo
+_LANG_CELL = f'(.//td[{has_class("a1")}])[1]'
+_SUBTITLE_ROWS = etree.XPath(f'//table//tbody//tr[{_LANG_CELL}//span][{_LANG_CELL}//a]')
+_LANG_TEXT = etree.XPath(f'string(({_LANG_CELL}//span)[1])', smart_strings=False)
+_SUBTITLE_LINK = etree.XPath(f'({_LANG_CELL}//a)[1]')
+_COMMENT_DIV = etree.XPath(f'(.//td[{has_class("a6")}])[1]//div[1]')
+_DOWNLOAD_BUTTON = etree.XPath(f'(//a[@id="downloadButton"] | //a[{has_class("download")}])[1]')
+# Primer link cuyo href contiene "download" (sin distinguir mayúsculas)
+_DOWNLOAD_LINK = etree.XPath(
+    '(//a[@href][contains(translate(@href, "DOWNLOAD", "download"), "download")])[1]'
+)
 
 
 class SubsceneProvider(SubtitleProvider):
@@ -23,6 +38,15 @@ class SubsceneProvider(SubtitleProvider):
         Language.ENGLISH: 'english',
     }
     
+    # ID de idioma de Subscene -> Language del resultado
+    _LANG_DETECT = {
+        'spanish': Language.SPANISH_SPAIN,
+        'english': Language.ENGLISH,
+    }
+    
+    def __init__(self):
+        self.session = self._create_session(retries=2, cached=True)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en Subscene."""
         results = []
@@ -31,31 +55,34 @@ class SubsceneProvider(SubtitleProvider):
             # Primero buscar la película/serie
             search_url = f"{self.BASE_URL}/subtitles/searchbytitle"
             
-            response = requests.post(
+            response = self.session.post(
                 search_url,
                 data={'query': query},
-                headers=self._get_headers(),
                 timeout=15,
                 allow_redirects=True
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Encontrar resultados de búsqueda (links a páginas de subtítulos)
             title_links = []
-            for div in soup.select('div.title a'):
+            for div in _TITLE_LINKS(tree):
                 href = div.get('href', '')
                 if href and '/subtitles/' in href:
-                    title_links.append(urljoin(self.BASE_URL, href))
+                    title_links.append(self._absolute_url(href))
             
-            # Si no hay resultados, intentar búsqueda directa
+            # Si no hay resultados, puede que haya redirigido directamente a la
+            # página de subtítulos: se usa la respuesta ya obtenida
             if not title_links:
-                # Puede que haya redirigido directamente a la página de subtítulos
-                title_links = [response.url]
+                pages = [response]
+            else:
+                # Las páginas de los títulos se descargan en paralelo
+                pages = self._fetch_pages(title_links[:3])  # Limitar a 3 títulos
             
-            # Obtener subtítulos del primer resultado (o del redirect)
-            for title_url in title_links[:3]:  # Limitar a 3 títulos
-                subs = self._get_subtitles_from_page(title_url, language)
+            for page in pages:
+                if page is None:
+                    continue
+                subs = self._parse_subtitles_page(parse_response(page), language)
                 results.extend(subs)
                 if len(results) >= 15:
                     break
@@ -65,19 +92,11 @@ class SubsceneProvider(SubtitleProvider):
         
         return results[:15]
     
-    def _get_subtitles_from_page(self, page_url: str, language: Optional[Language] = None) -> List[SubtitleResult]:
-        """Obtiene subtítulos de una página de título."""
+    def _parse_subtitles_page(self, tree, language: Optional[Language] = None) -> List[SubtitleResult]:
+        """Obtiene subtítulos del árbol HTML de una página de título."""
         results = []
         
         try:
-            response = requests.get(
-                page_url,
-                headers=self._get_headers(),
-                timeout=15
-            )
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            
             # Determinar idiomas a buscar
             target_langs = []
             if language:
@@ -86,51 +105,34 @@ class SubsceneProvider(SubtitleProvider):
                 target_langs = ['spanish', 'english']
             
             # Buscar filas de subtítulos
-            for row in soup.select('table tbody tr'):
+            for row in _SUBTITLE_ROWS(tree):
                 try:
-                    # Columna de idioma
-                    lang_cell = row.select_one('td.a1')
-                    if not lang_cell:
-                        continue
-                    
-                    lang_span = lang_cell.select_one('span')
-                    if not lang_span:
-                        continue
-                    
-                    lang_text = lang_span.get_text(strip=True).lower()
+                    # Columna de idioma (la XPath de filas ya descartó las
+                    # que no tienen idioma o link)
+                    lang_text = _LANG_TEXT(row).lower()
                     
                     # Filtrar por idioma
-                    if not any(tl in lang_text for tl in target_langs):
+                    matched = next((tl for tl in target_langs if tl in lang_text), None)
+                    if matched is None:
                         continue
                     
                     # Link y título
-                    link = lang_cell.select_one('a')
-                    if not link:
-                        continue
-                    
+                    link = _SUBTITLE_LINK(row)[0]
                     href = link.get('href', '')
-                    title_spans = link.select('span')
-                    title = ' '.join(s.get_text(strip=True) for s in title_spans)
+                    title = ' '.join(node_text(s) for s in link.iterdescendants('span'))
                     
                     # Determinar Language enum
-                    if 'english' in lang_text:
-                        lang_enum = Language.ENGLISH
-                    else:
-                        lang_enum = Language.SPANISH_SPAIN
+                    lang_enum = self._LANG_DETECT[matched]
                     
                     # Comentario/descripción
-                    comment_cell = row.select_one('td.a6')
-                    comment = ""
-                    if comment_cell:
-                        comment_div = comment_cell.select_one('div')
-                        if comment_div:
-                            comment = comment_div.get_text(strip=True)
+                    comment_divs = _COMMENT_DIV(row)
+                    comment = node_text(comment_divs[0]) if comment_divs else ""
                     
                     result = SubtitleResult(
                         title=title,
                         language=lang_enum,
                         provider=self.name,
-                        download_url=urljoin(self.BASE_URL, href),
+                        download_url=self._absolute_url(href),
                         description=comment[:200],
                     )
                     results.append(result)
@@ -147,51 +149,38 @@ class SubsceneProvider(SubtitleProvider):
         """Descarga un subtítulo de Subscene."""
         try:
             # Primero ir a la página del subtítulo
-            response = requests.get(
+            response = self.session.get(
                 subtitle.download_url,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
-            # Buscar botón de descarga
-            download_btn = soup.select_one('a#downloadButton, a.download')
-            if not download_btn:
-                # Buscar cualquier link de descarga
-                for a in soup.find_all('a', href=True):
-                    if 'download' in a.get('href', '').lower():
-                        download_btn = a
-                        break
+            # Buscar botón de descarga o, si no está, cualquier link de descarga
+            btns = _DOWNLOAD_BUTTON(tree) or _DOWNLOAD_LINK(tree)
+            download_btn = btns[0] if btns else None
             
-            if not download_btn:
+            if download_btn is None:
                 print("No se encontró botón de descarga en Subscene")
                 return None
             
-            download_url = urljoin(self.BASE_URL, download_btn.get('href', ''))
+            download_url = self._absolute_url(download_btn.get('href', ''))
             
             # Descargar archivo
-            dl_response = requests.get(
-                download_url,
-                headers=self._get_headers(),
-                timeout=30,
-                allow_redirects=True
-            )
+            with self._uncached():
+                dl_response = self.session.get(
+                    download_url,
+                    timeout=30,
+                    allow_redirects=True,
+                    stream=True
+                )
             
             # Determinar nombre del archivo
-            filename = "subtitle.zip"
-            content_disp = dl_response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
+            filename = response_filename(dl_response, "subtitle.zip")
             
             filepath = os.path.join(destination, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
-            
-            return filepath
+            return self._stream_to_file(dl_response, filepath)
             
         except Exception as e:
             print(f"Error descargando de Subscene: {e}")
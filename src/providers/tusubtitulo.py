@@ -1,12 +1,34 @@
 """Proveedor de subtítulos TuSubtitulo - Español España y Latino."""
 import re
 import os
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
 from urllib.parse import urljoin, quote
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from lxml import etree
+
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_response, node_text, has_class,
+                   response_filename)
+
+# Patrones y expresiones XPath compilados una sola vez al importar el módulo
+_SXXEYY_RE = re.compile(r'S\d+E\d+')
+_SXXEYY_GROUPS_RE = re.compile(r'S(\d+)E(\d+)', re.IGNORECASE)
+_YEAR_TAIL_RE = re.compile(r'\s+\d{4}\s*$')
+_EPISODE_RE = re.compile(r'(\d+)x(\d+)')
+_SHOW_LINKS = etree.XPath('//a[contains(@href, "/show/")]')
+_EPISODE_LINKS = etree.XPath('//a[contains(@href, "capitulo")]')
+_ROWS = etree.XPath('//tr')
+# Solo las dos primeras celdas de la fila
+_ROW_CELLS = etree.XPath('td[position() <= 2]')
+_FIRST_LINK = etree.XPath('(.//a[@href])[1]')
+_LOWER_TEXT = 'translate(string(), "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")'
+# Primer link (en orden del documento) a un .srt o cuyo texto dice descargar/download
+_DIRECT_LINK = etree.XPath(
+    f'(//a[@href][contains(@href, ".srt") or contains({_LOWER_TEXT}, "descargar")'
+    f' or contains({_LOWER_TEXT}, "download")])[1]'
+)
+_DOWNLOAD_BUTTON = etree.XPath(
+    f'(//a[{has_class("bt-descarga")}] | //a[{has_class("download")}] | //a[@download])[1]'
+)
 
 
 class TuSubtituloProvider(SubtitleProvider):
@@ -16,32 +38,35 @@ class TuSubtituloProvider(SubtitleProvider):
     supported_languages = [Language.SPANISH_SPAIN, Language.SPANISH_LATAM]
     BASE_URL = "https://www.tusubtitulo.com"
     
+    def __init__(self):
+        self.session = self._create_session(cached=True)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en TuSubtitulo."""
         results = []
         
         try:
             # Limpiar query - quitar S01E01, año, etc.
-            clean_query = re.sub(r'S\d+E\d+', '', query).strip()
-            clean_query = re.sub(r'\s+\d{4}\s*$', '', clean_query).strip()
+            clean_query = _SXXEYY_RE.sub('', query).strip()
+            clean_query = _YEAR_TAIL_RE.sub('', clean_query).strip()
             
             # TuSubtitulo usa búsqueda por serie
             search_url = f"{self.BASE_URL}/series.php"
             params = {'q': clean_query}
             
-            response = requests.get(
+            response = self.session.get(
                 search_url,
                 params=params,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Buscar series que coincidan
-            for item in soup.select('a[href*="/show/"]'):
+            show_urls = []
+            for item in _SHOW_LINKS(tree):
                 try:
-                    title = item.get_text(strip=True)
+                    title = node_text(item)
                     href = item.get('href', '')
                     
                     if not title or not href:
@@ -49,17 +74,18 @@ class TuSubtituloProvider(SubtitleProvider):
                     
                     # Si coincide con la búsqueda
                     if clean_query.lower() in title.lower():
-                        show_url = urljoin(self.BASE_URL, href)
-                        # Obtener subtítulos de esta serie
-                        subs = self._get_subtitles_from_show(show_url, query)
-                        results.extend(subs)
-                        
-                        if len(results) >= 15:
-                            break
+                        show_urls.append(urljoin(self.BASE_URL, href))
                             
                 except Exception:
                     continue
             
+            # Varios links suelen apuntar a la misma serie: cada página se pide
+            # una sola vez (se conserva el orden de aparición)
+            show_urls = list(dict.fromkeys(show_urls))
+            
+            # Obtener subtítulos de las series
+            results = self._collect_pages(show_urls, lambda page, limit: self._parse_show_page(page, query))
+            
             # Búsqueda alternativa directa
             if not results:
                 results = self._search_direct(clean_query)
@@ -74,17 +100,16 @@ class TuSubtituloProvider(SubtitleProvider):
         results = []
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.BASE_URL,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Buscar en últimos subtítulos
-            for item in soup.select('a[href*="capitulo"]'):
-                title = item.get_text(strip=True)
+            for item in _EPISODE_LINKS(tree):
+                title = node_text(item)
                 if query.lower() in title.lower():
                     result = SubtitleResult(
                         title=title,
@@ -100,21 +125,15 @@ class TuSubtituloProvider(SubtitleProvider):
         
         return results
     
-    def _get_subtitles_from_show(self, show_url: str, original_query: str) -> List[SubtitleResult]:
-        """Obtiene subtítulos de una página de serie."""
+    def _parse_show_page(self, response, original_query: str) -> List[SubtitleResult]:
+        """Obtiene subtítulos de la respuesta de una página de serie."""
         results = []
         
         try:
-            response = requests.get(
-                show_url,
-                headers=self._get_headers(),
-                timeout=15
-            )
-            
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Extraer temporada y episodio de la query original
-            se_match = re.search(r'S(\d+)E(\d+)', original_query, re.IGNORECASE)
+            se_match = _SXXEYY_GROUPS_RE.search(original_query)
             target_season = None
             target_episode = None
             if se_match:
@@ -122,15 +141,16 @@ class TuSubtituloProvider(SubtitleProvider):
                 target_episode = int(se_match.group(2))
             
             # Buscar tabla de episodios
-            for row in soup.select('tr'):
+            for row in _ROWS(tree):
                 try:
-                    cells = row.find_all('td')
+                    # Solo hacen falta las dos primeras celdas
+                    cells = _ROW_CELLS(row)
                     if len(cells) < 2:
                         continue
                     
                     # Buscar número de episodio
-                    ep_text = cells[0].get_text(strip=True)
-                    ep_match = re.search(r'(\d+)x(\d+)', ep_text)
+                    ep_text = node_text(cells[0])
+                    ep_match = _EPISODE_RE.search(ep_text)
                     
                     if ep_match:
                         season = int(ep_match.group(1))
@@ -142,9 +162,10 @@ class TuSubtituloProvider(SubtitleProvider):
                                 continue
                         
                         # Buscar link de descarga
-                        link = row.find('a', href=True)
-                        if link:
-                            title = f"S{season:02d}E{episode:02d} - {link.get_text(strip=True)}"
+                        links = _FIRST_LINK(row)
+                        if links:
+                            link = links[0]
+                            title = f"S{season:02d}E{episode:02d} - {node_text(link)}"
                             
                             result = SubtitleResult(
                                 title=title,
@@ -167,54 +188,43 @@ class TuSubtituloProvider(SubtitleProvider):
         """Descarga un subtítulo de TuSubtitulo."""
         try:
             # Ir a la página del subtítulo
-            response = requests.get(
+            response = self.session.get(
                 subtitle.download_url,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Buscar link de descarga directa
             download_link = None
-            for a in soup.find_all('a', href=True):
-                href = a.get('href', '')
-                text = a.get_text().lower()
-                if 'descargar' in text or 'download' in text or '.srt' in href:
-                    download_link = urljoin(self.BASE_URL, href)
-                    break
+            links = _DIRECT_LINK(tree)
+            if links:
+                download_link = urljoin(self.BASE_URL, links[0].get('href', ''))
             
             if not download_link:
                 # Buscar por clase
-                dl_btn = soup.select_one('a.bt-descarga, a.download, a[download]')
-                if dl_btn:
-                    download_link = urljoin(self.BASE_URL, dl_btn.get('href', ''))
+                btns = _DOWNLOAD_BUTTON(tree)
+                if btns:
+                    download_link = urljoin(self.BASE_URL, btns[0].get('href', ''))
             
             if not download_link:
                 return None
             
             # Descargar
-            dl_response = requests.get(
-                download_link,
-                headers=self._get_headers(),
-                timeout=30,
-                allow_redirects=True
-            )
+            with self._uncached():
+                dl_response = self.session.get(
+                    download_link,
+                    timeout=30,
+                    allow_redirects=True,
+                    stream=True
+                )
             
             # Determinar nombre
-            filename = "subtitle.srt"
-            content_disp = dl_response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
+            filename = response_filename(dl_response, "subtitle.srt")
             
             filepath = os.path.join(destination, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
-            
-            return filepath
+            return self._stream_to_file(dl_response, filepath)
             
         except Exception as e:
             print(f"Error descargando de TuSubtitulo: {e}")
@@ -1,14 +1,40 @@
 """Proveedor de subtítulos YIFY - Fácil acceso, multi-idioma."""
 import re
 import os
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Optional
 from urllib.parse import urljoin, quote
 import zipfile
 import io
 
-from .base import SubtitleProvider, SubtitleResult, Language
+from lxml import etree
+
+from .base import (SubtitleProvider, SubtitleResult, Language, parse_response, node_text, has_class,
+                   response_filename)
+
+# Patrones y expresiones XPath compilados una sola vez al importar el módulo
+_SXXEYY_RE = re.compile(r'S\d+E\d+')
+_YEAR_TAIL_RE = re.compile(r'\d{4}$')
+_SUBTITLE_ID_RE = re.compile(r'/subtitle/([^/]+)')
+_MOVIE_ITEMS = etree.XPath(f'//div[{has_class("media-body")}] | //li[{has_class("media")}]')
+_FIRST_LINK = etree.XPath('(.//a[@href])[1]')
+_H1 = etree.XPath('(//h1)[1]')
+_H2 = etree.XPath('(//h2)[1]')
+_SUBTITLE_ROWS = etree.XPath('//table//tbody//tr')
+_RATING_TEXT = etree.XPath(
+    f'string(((.//td[{has_class("rating-cell")}])[1]//span[{has_class("label")}])[1])',
+    smart_strings=False
+)
+_FLAG_CELL = etree.XPath(f'(.//td[{has_class("flag-cell")}])[1]')
+# Primer span con una clase "flag*"
+_FLAG_SPAN = etree.XPath('(.//span[contains(@class, "flag")])[1]')
+_LOWER_HREF = 'translate(@href, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")'
+_DOWNLOAD_BUTTON = etree.XPath(
+    f'(//a[{has_class("download-subtitle")}] | //a[contains(@href, "subtitle/download")])[1]'
+)
+# Cualquier link cuyo href contenga "download" y "subtitle" (sin distinguir mayúsculas)
+_DOWNLOAD_LINK = etree.XPath(
+    f'(//a[@href][contains({_LOWER_HREF}, "download")][contains({_LOWER_HREF}, "subtitle")])[1]'
+)
 
 
 class YifyProvider(SubtitleProvider):
@@ -24,72 +50,68 @@ class YifyProvider(SubtitleProvider):
         Language.ENGLISH: 'english',
     }
     
+    def __init__(self):
+        self.session = self._create_session(cached=True)
+    
     def search(self, query: str, language: Optional[Language] = None) -> List[SubtitleResult]:
         """Busca subtítulos en YIFY."""
         results = []
         
         try:
             # Limpiar query
-            clean_query = re.sub(r'S\d+E\d+', '', query).strip()
-            clean_query = re.sub(r'\d{4}$', '', clean_query).strip()
+            clean_query = _SXXEYY_RE.sub('', query).strip()
+            clean_query = _YEAR_TAIL_RE.sub('', clean_query).strip()
             
             search_url = f"{self.BASE_URL}/search"
             params = {'q': clean_query}
             
-            response = requests.get(
+            response = self.session.get(
                 search_url,
                 params=params,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Encontrar películas
-            for item in soup.select('div.media-body, li.media'):
+            movie_urls = []
+            for item in _MOVIE_ITEMS(tree):
                 try:
-                    link = item.find('a', href=True)
-                    if not link:
+                    links = _FIRST_LINK(item)
+                    if not links:
                         continue
                     
-                    href = link.get('href', '')
+                    href = links[0].get('href', '')
                     if '/movie-imdb/' not in href and '/subtitles/' not in href:
                         continue
                     
-                    title = link.get_text(strip=True)
-                    movie_url = urljoin(self.BASE_URL, href)
-                    
-                    # Obtener subtítulos de esta película
-                    subs = self._get_subtitles_for_movie(movie_url, language)
-                    results.extend(subs)
-                    
-                    if len(results) >= 15:
-                        break
+                    movie_urls.append(urljoin(self.BASE_URL, href))
                         
                 except Exception:
                     continue
+            
+            # Varios resultados pueden apuntar a la misma película: cada página
+            # se pide una sola vez (se conserva el orden de aparición)
+            movie_urls = list(dict.fromkeys(movie_urls))
+            
+            # Obtener subtítulos de las películas
+            results = self._collect_pages(movie_urls, lambda page, limit: self._parse_movie_page(page, language))
                     
         except Exception as e:
             print(f"Error buscando en YIFY: {e}")
         
         return results[:15]
     
-    def _get_subtitles_for_movie(self, movie_url: str, language: Optional[Language] = None) -> List[SubtitleResult]:
-        """Obtiene los subtítulos de una página de película."""
+    def _parse_movie_page(self, response, language: Optional[Language] = None) -> List[SubtitleResult]:
+        """Obtiene los subtítulos de la respuesta de una página de película."""
         results = []
         
         try:
-            response = requests.get(
-                movie_url,
-                headers=self._get_headers(),
-                timeout=15
-            )
-            
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
             # Obtener título de la película
-            title_elem = soup.find('h1') or soup.find('h2')
-            movie_title = title_elem.get_text(strip=True) if title_elem else "Película"
+            title_elems = _H1(tree) or _H2(tree)
+            movie_title = node_text(title_elems[0]) if title_elems else "Película"
             
             # Filtrar por idioma
             target_langs = []
@@ -99,56 +121,48 @@ class YifyProvider(SubtitleProvider):
                 target_langs = ['spanish', 'english']
             
             # Buscar filas de subtítulos
-            for row in soup.select('table tbody tr'):
+            for row in _SUBTITLE_ROWS(tree):
                 try:
                     # Rating
-                    rating_cell = row.select_one('td.rating-cell')
                     rating = 0
-                    if rating_cell:
-                        rating_span = rating_cell.select_one('span.label')
-                        if rating_span:
-                            try:
-                                rating = int(rating_span.get_text(strip=True))
-                            except:
-                                pass
+                    rating_text = _RATING_TEXT(row).strip()
+                    if rating_text:
+                        try:
+                            rating = int(rating_text)
+                        except:
+                            pass
                     
-                    # Idioma
-                    lang_cell = row.select_one('td.flag-cell')
-                    if lang_cell:
-                        lang_span = lang_cell.find('span', class_=re.compile(r'flag'))
-                        if lang_span:
-                            lang_class = ' '.join(lang_span.get('class', []))
-                            
-                            # Verificar idioma
-                            lang_ok = False
-                            for tl in target_langs:
-                                if tl in lang_class.lower():
-                                    lang_ok = True
-                                    break
-                            
-                            if not lang_ok:
-                                continue
+                    # Idioma: la clase del span de la bandera se baja a minúsculas
+                    # una sola vez y sirve para filtrar y para detectar el idioma
+                    lang_enum = Language.ENGLISH
+                    lang_cells = _FLAG_CELL(row)
+                    if lang_cells:
+                        lang_cell = lang_cells[0]
+                        lang_spans = _FLAG_SPAN(lang_cell)
+                        lang_class = lang_spans[0].get('class', '').lower() if lang_spans else ''
+                        
+                        # Verificar idioma
+                        if lang_spans and not any(tl in lang_class for tl in target_langs):
+                            continue
+                        
+                        lang_text = lang_class + ' ' + lang_cell.text_content().lower()
+                        if 'spanish' in lang_text or 'spain' in lang_text:
+                            lang_enum = Language.SPANISH_SPAIN
                     
                     # Link de descarga
-                    link = row.find('a', href=True)
-                    if not link:
+                    links = _FIRST_LINK(row)
+                    if not links:
                         continue
                     
+                    link = links[0]
                     href = link.get('href', '')
-                    sub_title = link.get_text(strip=True)
+                    sub_title = node_text(link)
                     
                     if not sub_title:
                         sub_title = movie_title
                     
                     download_url = urljoin(self.BASE_URL, href)
                     
-                    # Determinar idioma
-                    lang_enum = Language.ENGLISH
-                    if lang_cell:
-                        lang_text = str(lang_cell)
-                        if 'spanish' in lang_text.lower() or 'spain' in lang_text.lower():
-                            lang_enum = Language.SPANISH_SPAIN
-                    
                     result = SubtitleResult(
                         title=f"{movie_title} - {sub_title}",
                         language=lang_enum,
@@ -171,27 +185,20 @@ class YifyProvider(SubtitleProvider):
         """Descarga un subtítulo de YIFY."""
         try:
             # Ir a la página del subtítulo
-            response = requests.get(
+            response = self.session.get(
                 subtitle.download_url,
-                headers=self._get_headers(),
                 timeout=15
             )
             
-            soup = BeautifulSoup(response.text, 'lxml')
+            tree = parse_response(response)
             
-            # Buscar botón de descarga
-            download_btn = soup.select_one('a.download-subtitle, a[href*="subtitle/download"]')
-            if not download_btn:
-                # Buscar cualquier link de descarga
-                for a in soup.find_all('a', href=True):
-                    href = a.get('href', '')
-                    if 'download' in href.lower() and 'subtitle' in href.lower():
-                        download_btn = a
-                        break
+            # Buscar botón de descarga o, si no está, cualquier link de descarga
+            btns = _DOWNLOAD_BUTTON(tree) or _DOWNLOAD_LINK(tree)
+            download_btn = btns[0] if btns else None
             
-            if not download_btn:
+            if download_btn is None:
                 # Intentar construir URL de descarga
-                sub_id = re.search(r'/subtitle/([^/]+)', subtitle.download_url)
+                sub_id = _SUBTITLE_ID_RE.search(subtitle.download_url)
                 if sub_id:
                     download_url = f"{self.BASE_URL}/subtitle/{sub_id.group(1)}.zip"
                 else:
@@ -200,27 +207,20 @@ class YifyProvider(SubtitleProvider):
                 download_url = urljoin(self.BASE_URL, download_btn.get('href', ''))
             
             # Descargar
-            dl_response = requests.get(
-                download_url,
-                headers=self._get_headers(),
-                timeout=30,
-                allow_redirects=True
-            )
+            with self._uncached():
+                dl_response = self.session.get(
+                    download_url,
+                    timeout=30,
+                    allow_redirects=True,
+                    stream=True
+                )
             
             # Determinar nombre
-            filename = "subtitle.zip"
-            content_disp = dl_response.headers.get('Content-Disposition', '')
-            if 'filename=' in content_disp:
-                match = re.search(r'filename="?([^";\n]+)"?', content_disp)
-                if match:
-                    filename = match.group(1)
+            filename = response_filename(dl_response, "subtitle.zip")
             
             filepath = os.path.join(destination, filename)
             
-            with open(filepath, 'wb') as f:
-                f.write(dl_response.content)
-            
-            return filepath
+            return self._stream_to_file(dl_response, filepath)
             
         except Exception as e:
             print(f"Error descargando de YIFY: {e}")
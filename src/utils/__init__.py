@@ -1,4 +1,4 @@
-from .file_utils import get_video_files, extract_subtitle, rename_subtitle
+from .file_utils import get_video_files, extract_subtitle, extract_subtitle_from_zip, rename_subtitle, write_chunks
 from .parser import parse_video_filename
 
-__all__ = ['get_video_files', 'extract_subtitle', 'rename_subtitle', 'parse_video_filename']
+__all__ = ['get_video_files', 'extract_subtitle', 'extract_subtitle_from_zip', 'rename_subtitle', 'write_chunks', 'parse_video_filename']
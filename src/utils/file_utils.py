@@ -3,7 +3,7 @@ import os
 import zipfile
 import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
 try:
     import rarfile
@@ -11,23 +11,79 @@ try:
 except ImportError:
     RAR_SUPPORT = False
 
-VIDEO_EXTENSIONS = {'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.m4v', '.flv', '.webm'}
-SUBTITLE_EXTENSIONS = {'.srt', '.sub', '.ssa', '.ass', '.vtt'}
+VIDEO_EXTENSIONS = frozenset({'.mkv', '.mp4', '.avi', '.mov', '.wmv', '.m4v', '.flv', '.webm'})
+SUBTITLE_EXTENSIONS = frozenset({'.srt', '.sub', '.ssa', '.ass', '.vtt'})
+# Para str.endswith, que recorre la tupla en C
+_SUBTITLE_SUFFIXES = tuple(SUBTITLE_EXTENSIONS)
 
 
 def get_video_files(folder_path: str) -> List[str]:
     """Obtiene todos los archivos de video en una carpeta."""
-    video_files = []
-    folder = Path(folder_path)
+    # scandir aprovecha el tipo de archivo que ya trae el listado del directorio
+    # y evita un stat() por entrada
+    try:
+        with os.scandir(folder_path) as entries:
+            video_files = [
+                entry.path for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
     
-    if not folder.exists():
-        return video_files
+    video_files.sort()
+    return video_files
+
+
+def write_chunks(filepath: Union[str, os.PathLike], chunks) -> str:
+    """
+    Escribe bloques de bytes directo sobre el descriptor, sin BufferedWriter.
     
-    for file in folder.iterdir():
-        if file.is_file() and file.suffix.lower() in VIDEO_EXTENSIONS:
-            video_files.append(str(file))
+    Args:
+        filepath: Ruta del archivo a escribir (se trunca si existe)
+        chunks: Iterable de bloques bytes (o un solo bloque dentro de una lista)
+        
+    Returns:
+        La ruta escrita
+    """
+    # O_BINARY evita la conversión de saltos de línea en Windows
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(os.fspath(filepath), flags, 0o644)
+    try:
+        for chunk in chunks:
+            view = memoryview(chunk)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+    finally:
+        os.close(fd)
+    return os.fspath(filepath)
+
+
+def _first_subtitle_entry(entries):
+    """Primera entrada (ZipInfo/RarInfo) de un archivo comprimido que es un subtítulo."""
+    for info in entries:
+        if not info.is_dir() and info.filename.lower().endswith(_SUBTITLE_SUFFIXES):
+            return info
+    return None
+
+
+def extract_subtitle_from_zip(source: Union[str, BinaryIO], destination: str) -> Optional[str]:
+    """
+    Extrae el primer subtítulo de un .zip.
     
-    return sorted(video_files)
+    Args:
+        source: Ruta del .zip o archivo abierto (por ejemplo en memoria)
+        destination: Carpeta donde extraer
+        
+    Returns:
+        Ruta al subtítulo extraído o None si el .zip no contiene ninguno
+    """
+    with zipfile.ZipFile(source, 'r') as zf:
+        info = _first_subtitle_entry(zf.infolist())
+        if info is not None:
+            # extract() devuelve la ruta real (ya saneada) del archivo escrito
+            return zf.extract(info, destination)
+    return None
 
 
 def extract_subtitle(archive_path: str, destination: str) -> Optional[str]:
@@ -39,20 +95,14 @@ def extract_subtitle(archive_path: str, destination: str) -> Optional[str]:
     
     try:
         if archive_path.suffix.lower() == '.zip':
-            with zipfile.ZipFile(archive_path, 'r') as zf:
-                for name in zf.namelist():
-                    if Path(name).suffix.lower() in SUBTITLE_EXTENSIONS:
-                        zf.extract(name, destination)
-                        extracted_subtitle = str(destination / name)
-                        break
+            extracted_subtitle = extract_subtitle_from_zip(str(archive_path), str(destination))
         
         elif archive_path.suffix.lower() == '.rar' and RAR_SUPPORT:
             with rarfile.RarFile(archive_path, 'r') as rf:
-                for name in rf.namelist():
-                    if Path(name).suffix.lower() in SUBTITLE_EXTENSIONS:
-                        rf.extract(name, destination)
-                        extracted_subtitle = str(destination / name)
-                        break
+                info = _first_subtitle_entry(rf.infolist())
+                if info is not None:
+                    rf.extract(info, destination)
+                    extracted_subtitle = str(destination / info.filename)
         
         elif archive_path.suffix.lower() in SUBTITLE_EXTENSIONS:
             # Ya es un subtítulo, no necesita extracción
@@ -70,15 +120,19 @@ def rename_subtitle(subtitle_path: str, video_path: str) -> str:
     subtitle = Path(subtitle_path)
     video = Path(video_path)
     
+    # Nombres ya presentes, leídos en una sola pasada del directorio
+    # (normcase: en Windows la comparación no distingue mayúsculas)
+    with os.scandir(video.parent) as entries:
+        existing = {os.path.normcase(entry.name) for entry in entries}
+    
     new_name = video.stem + subtitle.suffix
-    new_path = video.parent / new_name
     
     # Si ya existe, agregar sufijo
     counter = 1
-    while new_path.exists():
+    while os.path.normcase(new_name) in existing:
         new_name = f"{video.stem}.{counter}{subtitle.suffix}"
-        new_path = video.parent / new_name
         counter += 1
     
-    subtitle.rename(new_path)
+    new_path = video.parent / new_name
+    os.replace(subtitle, new_path)
     return str(new_path)
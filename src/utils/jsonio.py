@@ -0,0 +1,23 @@
+"""Lectura y escritura de JSON, con orjson cuando está instalado."""
+import json
+
+# orjson es opcional: parsea y serializa JSON bastante más rápido
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_loads(content: bytes):
+    """Parsea el cuerpo JSON de una respuesta."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def json_dumps(obj) -> bytes:
+    """Serializa el cuerpo JSON de un pedido."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
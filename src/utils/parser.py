@@ -1,5 +1,6 @@
 """Parser para nombres de archivos de video."""
 import re
+from functools import lru_cache
 from typing import Dict, Optional
 
 try:
@@ -8,15 +9,69 @@ try:
 except ImportError:
     GUESSIT_AVAILABLE = False
 
+# Patrones compilados una sola vez al importar el módulo
+_EXTENSION_RE = re.compile(r'\.[a-zA-Z0-9]{2,4}$')
+_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+# Temporada/episodio en un solo patrón: S01E01 en cualquier parte del nombre
+# tiene prioridad sobre 1x01 (la primera alternativa recorre todo el nombre
+# antes de probar la segunda), igual que buscar primero uno y después el otro
+_SEASON_EPISODE_RE = re.compile(
+    r'(?:.*?(?P<sxe>[Ss](\d{1,2})[Ee](\d{1,2}))|.*?(?P<nxn>(\d{1,2})x(\d{1,2})))',
+    re.DOTALL
+)
+_QUALITY_TOKENS = frozenset({'720p', '1080p', '2160p', '4k', 'x264', 'x265', 'bluray', 'webrip', 'hdtv', 'brrip'})
+
 
 def parse_video_filename(filename: str) -> Dict[str, Optional[str]]:
     """
     Extrae información del nombre del archivo de video.
     Retorna dict con: title, year, season, episode, release_group
     """
+    # Copia: el dict cacheado no debe quedar expuesto a modificaciones
+    return dict(_parse_cached(filename))
+
+
+@lru_cache(maxsize=2048)
+def _parse_cached(filename: str) -> Dict[str, Optional[str]]:
+    """Parsea una sola vez cada nombre (se repite al consultar varios proveedores)."""
+    # El parser manual es mucho más rápido que guessit y alcanza para los
+    # nombres típicos (Titulo.S01E01..., Titulo.2020...): guessit queda para
+    # todo lo que no siga esa plantilla
+    manual = _parse_manual(filename)
+    if _manual_is_reliable(filename, manual):
+        return manual
     if GUESSIT_AVAILABLE:
         return _parse_with_guessit(filename)
-    return _parse_manual(filename)
+    return manual
+
+
+def _clean_name(filename: str) -> str:
+    """Nombre sin extensión, con puntos y guiones bajos como espacios."""
+    name = _EXTENSION_RE.sub('', filename)
+    return name.replace('.', ' ').replace('_', ' ')
+
+
+def _manual_is_reliable(filename: str, manual: Dict[str, Optional[str]]) -> bool:
+    """
+    Indica si el nombre sigue una plantilla que el parser manual no confunde.
+    
+    Solo valen Titulo.S01E01... o Titulo.2020... con ese año como último número
+    tipo año: 1x01 también calza con resoluciones (1920x1080) y un título
+    puede empezar o terminar en un año (2001.A.Space.Odyssey.1968,
+    Blade.Runner.2049.2017).
+    """
+    if not manual['title']:
+        return False
+    
+    name = _clean_name(filename)
+    se_match = _SEASON_EPISODE_RE.match(name)
+    if se_match:
+        return se_match.group('sxe') is not None and bool(name[:se_match.start('sxe')].strip())
+    
+    # El parser manual toma el primer año: tiene que ser también el último
+    # y venir después del título
+    years = list(_YEAR_RE.finditer(name))
+    return len(years) == 1 and bool(name[:years[0].start()].strip())
 
 
 def _parse_with_guessit(filename: str) -> Dict[str, Optional[str]]:
@@ -54,11 +109,10 @@ def _parse_manual(filename: str) -> Dict[str, Optional[str]]:
     }
     
     # Limpiar extensión y reemplazar puntos/guiones bajos
-    name = re.sub(r'\.[a-zA-Z0-9]{2,4}$', '', filename)
-    name = name.replace('.', ' ').replace('_', ' ')
+    name = _clean_name(filename)
     
     # Buscar año (1900-2099)
-    year_match = re.search(r'\b(19\d{2}|20\d{2})\b', name)
+    year_match = _YEAR_RE.search(name)
     if year_match:
         result['year'] = year_match.group(1)
         # El título suele estar antes del año
@@ -66,23 +120,31 @@ def _parse_manual(filename: str) -> Dict[str, Optional[str]]:
         result['title'] = title_part if title_part else None
     
     # Buscar temporada y episodio (S01E01, 1x01, etc.)
-    se_match = re.search(r'[Ss](\d{1,2})[Ee](\d{1,2})', name)
-    if not se_match:
-        se_match = re.search(r'(\d{1,2})x(\d{1,2})', name)
+    se_match = _SEASON_EPISODE_RE.match(name)
     
     if se_match:
-        result['season'] = int(se_match.group(1))
-        result['episode'] = int(se_match.group(2))
+        if se_match.group('sxe') is not None:
+            se_start = se_match.start('sxe')
+            season, episode = se_match.group(2, 3)
+        else:
+            se_start = se_match.start('nxn')
+            season, episode = se_match.group(5, 6)
+        result['season'] = int(season)
+        result['episode'] = int(episode)
         # Si no tenemos título del año, tomarlo antes del S01E01
         if not result['title']:
-            title_part = name[:se_match.start()].strip()
+            title_part = name[:se_start].strip()
             result['title'] = title_part if title_part else None
     
     # Si aún no hay título, usar el nombre limpio
     if not result['title']:
-        # Remover calidad común y otros tags
-        clean = re.sub(r'\b(720p|1080p|2160p|4k|x264|x265|bluray|webrip|hdtv|brrip)\b', '', name, flags=re.IGNORECASE)
-        result['title'] = clean.strip()
+        # Remover calidad común y otros tags; se mira lo anterior al guion
+        # para que 1080p-GROUP o x264-RARBG también se descarten
+        clean = ' '.join(
+            token for token in name.split()
+            if token.split('-', 1)[0].lower() not in _QUALITY_TOKENS
+        )
+        result['title'] = clean
     
     return result
 
@@ -0,0 +1,117 @@
+"""Conjunto acotado de recursos reusados entre hilos (ProviderPool de Subliminal)."""
+import atexit
+import queue
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+# Colas con recursos abiertos; se cierran al salir sin retener a sus dueños
+_open_queues = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all():
+    for pool_queue in list(_open_queues):
+        pool_queue.close()
+
+
+class PoolQueue:
+    """
+    Hasta `size` recursos abiertos a demanda y reusados por cualquier hilo.
+    
+    Cada uso toma uno libre de la cola; si no hay, abre otro mientras no se
+    llegue al máximo y si no espera a que algún hilo devuelva el suyo. Así da
+    igual cuántos hilos distintos lo usen: nunca hay más de `size` abiertos
+    y un recurso nunca lo usan dos hilos a la vez.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], closer: Callable[[Any], None],
+                 size: int = 1, reset: Optional[Callable[[Any], None]] = None):
+        """
+        Args:
+            factory: Abre un recurso nuevo
+            closer: Cierra un recurso
+            size: Máximo de recursos abiertos a la vez
+            reset: Se llama sobre el recurso cada vez que se toma de la cola
+        """
+        self._factory = factory
+        self._closer = closer
+        self._reset = reset
+        self._size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        # Cambia en cada close(): lo que estaba en uso se cierra al devolverse
+        self._generation = 0
+    
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """Presta un recurso de la cola mientras dura el bloque with."""
+        item, generation = self._acquire()
+        try:
+            if self._reset is not None:
+                self._reset(item)
+            yield item
+        finally:
+            self._release(item, generation)
+    
+    def _acquire(self):
+        while True:
+            with self._lock:
+                generation = self._generation
+                try:
+                    return self._idle.get_nowait(), generation
+                except queue.Empty:
+                    create = self._created < self._size
+                    if create:
+                        self._created += 1
+            
+            if create:
+                break
+            # Esperar a que otro hilo devuelva uno; el timeout vuelve a mirar
+            # el contador por si un close() dejó lugar para abrir otro
+            try:
+                item = self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Lo que queda en la cola siempre es de la generación actual
+            with self._lock:
+                return item, self._generation
+        
+        try:
+            item = self._factory()
+        except Exception:
+            with self._lock:
+                if generation == self._generation:
+                    self._created -= 1
+            raise
+        _open_queues.add(self)
+        return item, generation
+    
+    def _release(self, item, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._idle.put(item)
+                return
+        self._safe_close(item)
+    
+    def _safe_close(self, item):
+        try:
+            self._closer(item)
+        except Exception:
+            pass
+    
+    def close(self):
+        """Cierra los recursos libres; los que están en uso se cierran al devolverse."""
+        with self._lock:
+            self._generation += 1
+            self._created = 0
+            idle = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for item in idle:
+            self._safe_close(item)
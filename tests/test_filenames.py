@@ -0,0 +1,53 @@
+"""Tests de los nombres de archivo informados por los servidores."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.providers.base import response_filename, safe_filename
+
+
+class _Response:
+    """Respuesta mínima: response_filename solo mira los headers."""
+    
+    def __init__(self, content_disposition=None):
+        self.headers = {}
+        if content_disposition is not None:
+            self.headers['Content-Disposition'] = content_disposition
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('sub.srt', 'sub.srt'),
+    ('  sub.srt  ', 'sub.srt'),
+    ('../../evil.srt', 'evil.srt'),
+    ('..\\x.srt', 'x.srt'),
+    ('C:\\Windows\\evil.srt', 'evil.srt'),
+    ('/etc/evil.srt', 'evil.srt'),
+    ('', 'default.srt'),
+    ('.', 'default.srt'),
+    ('..', 'default.srt'),
+    ('dir/', 'default.srt'),
+    (None, 'default.srt'),
+])
+def test_safe_filename(name, expected):
+    assert safe_filename(name, 'default.srt') == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('attachment; filename="sub.zip"', 'sub.zip'),
+    ('attachment; filename=sub.zip', 'sub.zip'),
+    ('attachment; filename=sub.zip; size=10', 'sub.zip'),
+    ('attachment; filename="sub.zip"; size=10', 'sub.zip'),
+    ('attachment; filename=sub.zip\nX-Other: 1', 'sub.zip'),
+    ('attachment; filename="../../evil.srt"', 'evil.srt'),
+    ('attachment; filename=..\\x.srt', 'x.srt'),
+    ('attachment; filename=".."', 'default.zip'),
+    ('attachment; filename=.', 'default.zip'),
+    ('attachment; filename=""', 'default.zip'),
+    ('attachment', 'default.zip'),
+    (None, 'default.zip'),
+])
+def test_response_filename(header, expected):
+    assert response_filename(_Response(header), 'default.zip') == expected
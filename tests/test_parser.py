@@ -0,0 +1,51 @@
+"""Tests del parser de nombres de video."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import parser
+from src.utils.parser import _parse_manual, parse_video_filename
+
+
+def test_fallback_title_drops_quality_tokens_with_group_suffix():
+    result = _parse_manual('Some.Movie.1080p.BluRay.x264-RARBG.mkv')
+    assert result['title'] == 'Some Movie'
+
+
+def test_fallback_title_drops_resolution_with_group_suffix():
+    result = _parse_manual('Some.Movie.1080p-GROUP.mkv')
+    assert result['title'] == 'Some Movie'
+
+
+def _parse_with_fake_guessit(monkeypatch, filename):
+    """Parsea con un guessit falso para ver si el nombre pasa por él."""
+    monkeypatch.setattr(parser, 'GUESSIT_AVAILABLE', True)
+    monkeypatch.setattr(parser, 'guessit', lambda name: {'title': 'guessit'}, raising=False)
+    parser._parse_cached.cache_clear()
+    try:
+        return parse_video_filename(filename)
+    finally:
+        parser._parse_cached.cache_clear()
+
+
+def test_manual_result_used_for_sxxeyy(monkeypatch):
+    result = _parse_with_fake_guessit(monkeypatch, 'Some.Show.S01E02.720p.mkv')
+    assert (result['title'], result['season'], result['episode']) == ('Some Show', 1, 2)
+
+
+def test_manual_result_used_for_title_then_year(monkeypatch):
+    result = _parse_with_fake_guessit(monkeypatch, 'Some.Movie.2019.1080p.mkv')
+    assert (result['title'], result['year']) == ('Some Movie', '2019')
+
+
+def test_resolution_is_not_taken_as_season_episode(monkeypatch):
+    assert _parse_with_fake_guessit(monkeypatch, 'Movie.1920x1080.mkv')['title'] == 'guessit'
+
+
+def test_year_in_title_falls_back_to_guessit(monkeypatch):
+    assert _parse_with_fake_guessit(monkeypatch, 'Blade.Runner.2049.2017.1080p.mkv')['title'] == 'guessit'
+
+
+def test_leading_year_falls_back_to_guessit(monkeypatch):
+    assert _parse_with_fake_guessit(monkeypatch, '2001.A.Space.Odyssey.1968.mkv')['title'] == 'guessit'